@@ -0,0 +1,48 @@
+"""
+Measure the per-case memory overhead of parametrized tests.
+
+Run with:
+
+    python benchmarks/memory.py [count]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+import unittest
+
+from unittest_parametrize import ParametrizedTestCase, parametrize
+
+
+def main(argv: list[str]) -> None:
+    count = int(argv[0]) if argv else 100_000
+    values = list(range(count))
+    gc.collect()
+
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+
+    class BenchmarkTests(ParametrizedTestCase):
+        @parametrize("x", values)
+        def test_x(self, x: int) -> None:
+            pass
+
+    defined, _ = tracemalloc.get_traced_memory()
+
+    names = unittest.TestLoader().getTestCaseNames(BenchmarkTests)
+    for name in names:
+        getattr(BenchmarkTests, name)
+    gc.collect()
+    accessed, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(names) == count
+    print(f"{count} params")
+    print(f"defined:  {(defined - start) / count:8.1f} bytes per case")
+    print(f"accessed: {(accessed - start) / count:8.1f} bytes per case")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,231 @@
+"""
+Measure how defining and collecting parametrized tests scales with the number
+of params.
+
+Run the benchmarks and save the results with:
+
+    python benchmarks/scaling.py run --output results.json
+
+Then compare results between two releases with:
+
+    python benchmarks/scaling.py compare before.json after.json
+
+The comparison exits with status 1 if any measurement regressed by more than
+the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import unittest
+from collections.abc import Callable, Sequence
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+from unittest import IsolatedAsyncioTestCase
+
+from unittest_parametrize import ParametrizedTestCase, param, parametrize
+
+COUNTS = [10, 100, 1_000, 10_000, 100_000]
+
+METRICS = ["decorator_seconds", "class_seconds", "collect_seconds", "peak_bytes"]
+
+
+def tuple_case(count: int) -> dict[str, Any]:
+    return {"argnames": "x,y", "argvalues": [(i, i) for i in range(count)]}
+
+
+def param_case(count: int) -> dict[str, Any]:
+    return {
+        "argnames": "x,y",
+        "argvalues": [param(i, i, id=f"p{i}") for i in range(count)],
+    }
+
+
+def single_case(count: int) -> dict[str, Any]:
+    return {"argnames": "x", "argvalues": list(range(count))}
+
+
+def callable_ids_case(count: int) -> dict[str, Any]:
+    return {
+        "argnames": "x,y",
+        "argvalues": [(i, -i) for i in range(count)],
+        "ids": lambda value: f"n{abs(value)}",
+    }
+
+
+CASES: dict[str, Callable[[int], dict[str, Any]]] = {
+    "tuple": tuple_case,
+    "param": param_case,
+    "single": single_case,
+    "callable_ids": callable_ids_case,
+}
+
+
+def make_test(is_async: bool) -> Callable[..., Any]:
+    # A fresh function each time, since parametrize() marks the function.
+    if is_async:
+
+        async def test_x(self: unittest.TestCase, **params: Any) -> None:
+            pass
+
+    else:
+
+        def test_x(self: unittest.TestCase, **params: Any) -> None:  # type: ignore[misc]
+            pass
+
+    return test_x
+
+
+def measure(kind: str, count: int, is_async: bool) -> dict[str, Any]:
+    kwargs = CASES[kind](count)
+    bases: tuple[type, ...] = (ParametrizedTestCase,)
+    if is_async:
+        bases += (IsolatedAsyncioTestCase,)
+    func = make_test(is_async)
+
+    gc.collect()
+    start = time.perf_counter()
+    decorated = parametrize(**kwargs)(func)
+    decorated_at = time.perf_counter()
+    test_case = type("BenchmarkTests", bases, {"test_x": decorated})
+    defined_at = time.perf_counter()
+    suite = unittest.TestLoader().loadTestsFromTestCase(test_case)
+    collected_at = time.perf_counter()
+    assert suite.countTestCases() == count
+
+    return {
+        "decorator_seconds": decorated_at - start,
+        "class_seconds": defined_at - decorated_at,
+        "collect_seconds": collected_at - defined_at,
+    }
+
+
+def measure_peak(kind: str, count: int, is_async: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        measure(kind, count, is_async)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(args: argparse.Namespace) -> int:
+    try:
+        package_version = version("unittest-parametrize")
+    except PackageNotFoundError:
+        package_version = "unknown"
+
+    results = []
+    for is_async in (False, True):
+        for kind in CASES:
+            for count in COUNTS:
+                if count > args.max_count:
+                    continue
+                timings = [measure(kind, count, is_async) for _ in range(args.repeat)]
+                result: dict[str, Any] = {
+                    "kind": kind,
+                    "async": is_async,
+                    "count": count,
+                }
+                for metric in METRICS[:-1]:
+                    result[metric] = min(t[metric] for t in timings)
+                result["peak_bytes"] = measure_peak(kind, count, is_async)
+                results.append(result)
+                print(
+                    f"{kind:>12} {'async' if is_async else 'sync':>5} {count:>7}:"
+                    + f" decorator {result['decorator_seconds']:.4f}s,"
+                    + f" class {result['class_seconds']:.4f}s,"
+                    + f" collect {result['collect_seconds']:.4f}s,"
+                    + f" peak {result['peak_bytes'] / 1024 / 1024:.1f}MiB"
+                )
+
+    data = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "unittest_parametrize": package_version,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(data, fp, indent=2)
+            fp.write("\n")
+    return 0
+
+
+def result_key(result: dict[str, Any]) -> tuple[str, bool, int]:
+    return (result["kind"], result["async"], result["count"])
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.before) as fp:
+        before = {result_key(r): r for r in json.load(fp)["results"]}
+    with open(args.after) as fp:
+        after = {result_key(r): r for r in json.load(fp)["results"]}
+
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        kind, is_async, count = key
+        for metric in METRICS:
+            old = before[key][metric]
+            new = after[key][metric]
+            ratio = new / old if old else 1.0
+            flag = ""
+            if ratio > args.threshold:
+                regressions += 1
+                flag = "  REGRESSION"
+            print(
+                f"{kind:>12} {'async' if is_async else 'sync':>5} {count:>7}"
+                + f" {metric:>17}: {ratio:6.2f}x{flag}"
+            )
+
+    print(f"{regressions} regression(s) above {args.threshold:.2f}x")
+    return 1 if regressions else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--output", help="Path to write JSON results to.")
+    run_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timing runs per measurement, keeping the fastest.",
+    )
+    run_parser.add_argument(
+        "--max-count",
+        type=int,
+        default=COUNTS[-1],
+        help="Largest number of params to measure.",
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare two JSON result files."
+    )
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Ratio of after to before above which a measurement regressed.",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)  # type: ignore[no-any-return]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,76 @@
 from __future__ import annotations
 
+import fnmatch
 import inspect
+import itertools
+import math
+import os
+import re
+import signal
 import sys
-from collections.abc import Callable, Sequence
-from functools import wraps
-from types import FunctionType
-from typing import Any, ParamSpec, TypeVar
-from unittest import TestCase
+import threading
+import time
+import traceback
+import weakref
+import zlib
+from collections.abc import (
+    Awaitable,
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from contextlib import AbstractContextManager, contextmanager
+from functools import lru_cache, partial, wraps
+from types import FunctionType, MethodType, TracebackType
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, ParamSpec, TypeVar, overload
+from unittest import SkipTest, TestCase, TestResult
+
+# Modules for optional features are imported where they are used, to keep
+# importing this package fast.
+if TYPE_CHECKING:
+    import random
+
+    from unittest_parametrize import _files
 
 
 class ParametrizedTestCase(TestCase):
+    parametrize_select: ClassVar[str | None] = None
+    parametrize_shard_index: ClassVar[int | None] = None
+    parametrize_shard_count: ClassVar[int | None] = None
+    parametrize_timings_file: ClassVar[str | None] = None
+    parametrize_report_file: ClassVar[str | None] = None
+    parametrize_slowest: ClassVar[int | None] = None
+    parametrize_profile_dir: ClassVar[str | None] = None
+    parametrize_trace_memory: ClassVar[bool | None] = None
+    parametrize_benchmark_file: ClassVar[str | None] = None
+    parametrize_benchmark_baseline: ClassVar[str | None] = None
+    parametrize_benchmark_threshold: ClassVar[float | None] = None
+    parametrize_sample_size: ClassVar[int | None] = None
+    parametrize_sample_fraction: ClassVar[float | None] = None
+    parametrize_sample_seed: ClassVar[int | None] = None
+    parametrize_last_failed: ClassVar[Literal["record", "first", "only"] | None] = None
+    parametrize_incremental: ClassVar[bool | None] = None
+    _parametrize_settings: ClassVar[_Settings]
+
     @classmethod
     def __init_subclass__(cls, **kwargs: Any) -> None:
         super().__init_subclass__(**kwargs)
+        settings = cls._parametrize_settings = _Settings(cls)
+
+        for base in cls.__mro__[1:]:
+            if "_parametrized" in base.__dict__ and (
+                cls.__dict__.get("_parametrized_base") is not base
+            ):
+                raise TypeError(
+                    f"Cannot subclass {base.__qualname__}, which is decorated"
+                    + " with @parametrize"
+                )
 
+        parametrized_funcs = []
+        test_names: set[str] = set()
         for name, func in list(cls.__dict__.items()):
             if not isinstance(func, FunctionType):
                 continue
@@ -29,154 +86,1617 @@ class ParametrizedTestCase(TestCase):
                 )
 
             _parametrized = func._parametrized
-            delattr(cls, name)
+            func_test_names = []
             for param in _parametrized.params:
-                params = dict(zip(_parametrized.argnames, param.args))
-
-                if inspect.iscoroutinefunction(func):
-
-                    @wraps(func)
-                    async def test(
-                        self: TestCase,
-                        *args: Any,
-                        _func: FunctionType = func,
-                        _params: dict[str, Any] = params,
-                        **kwargs: Any,
-                    ) -> Any:
-                        try:
-                            return await _func(self, *args, **_params, **kwargs)
-                        except Exception as exc:
-                            if sys.version_info >= (3, 11):
-                                exc.add_note(
-                                    "Test parameters: "
-                                    + ", ".join(
-                                        f"{k}={v!r}" for k, v in _params.items()
-                                    )
-                                )
-                            raise
+                test_name = f"{name}_{param.id}"
 
-                else:
+                if _parametrized.mode != "subtest":
+                    if hasattr(cls, test_name) or test_name in test_names:
+                        raise ValueError(
+                            f"Duplicate test name {test_name} in {cls.__name__}"
+                        )
+                    test_names.add(test_name)
 
-                    @wraps(func)
-                    def test(
-                        self: TestCase,
-                        *args: Any,
-                        _func: FunctionType = func,
-                        _params: dict[str, Any] = params,
-                        **kwargs: Any,
-                    ) -> Any:
-                        try:
-                            return _func(self, *args, **_params, **kwargs)
-                        except Exception as exc:
-                            if sys.version_info >= (3, 11):
-                                exc.add_note(
-                                    "Test parameters: "
-                                    + ", ".join(
-                                        f"{k}={v!r}" for k, v in _params.items()
-                                    )
-                                )
-                            raise
-
-                test.__name__ = f"{name}_{param.id}"
-                test.__qualname__ = f"{test.__qualname__}_{param.id}"
-
-                if hasattr(cls, test.__name__):
-                    raise ValueError(
-                        f"Duplicate test name {test.__name__} in {cls.__name__}"
+                func_test_names.append(test_name)
+            parametrized_funcs.append((name, func, func_test_names))
+
+        selected = _select_test_names(
+            cls, settings, [(name, names) for name, _, names in parametrized_funcs]
+        )
+
+        last_failed = settings.last_failed
+        failed: dict[str, bool] = {}
+        if last_failed is not None:
+            from unittest_parametrize import _last_failed
+
+            failed = _last_failed.load(_last_failed.path()).get(_class_name(cls), {})
+
+        for name, func, func_test_names in parametrized_funcs:
+            indices = [
+                index
+                for index, test_name in enumerate(func_test_names)
+                if selected is None or test_name in selected
+            ]
+            if last_failed == "first":
+                indices.sort(key=lambda index: func_test_names[index] not in failed)
+
+            if func._parametrized.mode == "subtest":
+                setattr(cls, name, _make_subtest_test(func, name, indices))
+                continue
+
+            delattr(cls, name)
+            test_type = (
+                _AsyncParametrizedTest
+                if inspect.iscoroutinefunction(func)
+                else _ParametrizedTest
+            )
+            for index in indices:
+                setattr(cls, func_test_names[index], test_type(func, name, index))
+
+    def run(self, result: TestResult | None = None) -> TestResult | None:
+        # Kept for max_failures, which counts failures per result.
+        self._parametrize_result = result
+        return super().run(result)
+
+
+def _select_test_names(
+    cls: type[ParametrizedTestCase],
+    settings: _Settings,
+    funcs: list[tuple[str, list[str]]],
+) -> set[str] | None:
+    select = settings.select
+    if select is not None:
+        funcs = [
+            (name, [n for n in test_names if select.match(n)])
+            for name, test_names in funcs
+        ]
+
+    last_failed = settings.last_failed
+    if last_failed == "only":
+        from unittest_parametrize import _last_failed
+
+        failed = _last_failed.load(_last_failed.path())
+        # Like pytest's --lf, run everything when nothing failed.
+        if failed:
+            class_failed = failed.get(_class_name(cls), {})
+            funcs = [
+                (name, [n for n in test_names if n in class_failed])
+                for name, test_names in funcs
+            ]
+
+    sample = settings.sample
+    if sample is not None:
+        import random
+
+        size, fraction, seed = sample
+        funcs = [
+            (
+                name,
+                _sample_test_names(
+                    test_names,
+                    size,
+                    fraction,
+                    # Seeded per method, so samples do not depend on others.
+                    random.Random(f"{seed}:{_class_name(cls)}.{name}"),
+                ),
+            )
+            for name, test_names in funcs
+        ]
+
+    test_names = [n for _, names in funcs for n in names]
+    shard = settings.shard
+    if shard is None:
+        if select is None and last_failed != "only" and sample is None:
+            return None
+        return set(test_names)
+
+    index, count = shard
+    timings_file = settings.timings_file
+    if timings_file is not None:
+        from unittest_parametrize import _timings
+
+        class_name = _class_name(cls)
+        selected = _timings.shard_test_names(
+            class_name,
+            test_names,
+            index,
+            count,
+            _timings.load(timings_file).get(class_name, {}),
+        )
+        if selected is not None:
+            return selected
+
+    return {name for name in test_names if _in_shard(name, index, count)}
+
+
+class _Settings:
+    # Options from class attributes, or else environment variables, resolved
+    # once per class, since tests are too many to resolve them per test.
+    __slots__ = (
+        "benchmark_baseline",
+        "benchmark_file",
+        "benchmark_threshold",
+        "incremental",
+        "last_failed",
+        "per_case",
+        "profile",
+        "profile_dir",
+        "report_file",
+        "sample",
+        "select",
+        "shard",
+        "slowest",
+        "timings_file",
+        "trace_memory",
+    )
+
+    def __init__(self, cls: type[ParametrizedTestCase]) -> None:
+        select = _option(cls, "select", _getenv_str)
+        self.select = None if select is None else _compile_select(select)
+        self.shard = _shard_option(cls)
+        self.sample = _sample_option(cls)
+        self.last_failed = _last_failed_option(cls)
+        self.timings_file = _option(cls, "timings_file", _getenv_str)
+        self.report_file = _option(cls, "report_file", _getenv_str)
+        if self.report_file is not None and not self.report_file.endswith(
+            (".json", ".csv")
+        ):
+            raise ValueError(
+                f"Report file {self.report_file!r} must have a .json or .csv"
+                + " extension"
+            )
+        self.slowest = _option(cls, "slowest", _getenv_int)
+        self.profile = _profile_option()
+        self.profile_dir = _option(cls, "profile_dir", _getenv_str) or "prof"
+        self.trace_memory = bool(_option(cls, "trace_memory", _getenv_flag))
+        self.benchmark_file = _option(cls, "benchmark_file", _getenv_str)
+        self.benchmark_baseline = _option(cls, "benchmark_baseline", _getenv_str)
+        threshold = _option(cls, "benchmark_threshold", _getenv_float)
+        self.benchmark_threshold = 1.25 if threshold is None else threshold
+        self.incremental = bool(_option(cls, "incremental", _getenv_flag))
+        # Whether any option applies to each case, rather than to the class.
+        self.per_case = bool(
+            self.sample is not None
+            or self.last_failed is not None
+            or self.timings_file is not None
+            or self.report_file is not None
+            or self.slowest is not None
+            or self.profile
+            or self.trace_memory
+            or self.incremental
+        )
+
+
+def _option(
+    cls: type[ParametrizedTestCase], name: str, getenv: Callable[[str], T | None]
+) -> T | None:
+    value: T | None = getattr(cls, f"parametrize_{name}")
+    if value is None:
+        value = getenv(f"UNITTEST_PARAMETRIZE_{name.upper()}")
+    return value
+
+
+def _last_failed_option(
+    cls: type[ParametrizedTestCase],
+) -> Literal["record", "first", "only"] | None:
+    mode = _option(cls, "last_failed", _getenv_str)
+    if mode not in (None, "record", "first", "only"):
+        raise ValueError(
+            f"Last failed mode must be 'record', 'first', or 'only', not {mode!r}"
+        )
+    return mode  # type: ignore [return-value]
+
+
+@lru_cache
+def _compile_select(select: str) -> re.Pattern[str]:
+    patterns = [p.strip() for p in select.split(",") if p.strip()]
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+def _sample_option(
+    cls: type[ParametrizedTestCase],
+) -> tuple[int | None, float | None, int] | None:
+    size = _option(cls, "sample_size", _getenv_int)
+    fraction = _option(cls, "sample_fraction", _getenv_float)
+
+    if size is None and fraction is None:
+        return None
+    if size is not None and size < 1:
+        raise ValueError(f"Sample size must be at least 1, not {size!r}")
+    if fraction is not None and not 0 < fraction <= 1:
+        raise ValueError(
+            f"Sample fraction must be greater than 0 and at most 1, not {fraction!r}"
+        )
+
+    seed = _option(cls, "sample_seed", _getenv_int)
+    if seed is None:
+        seed = _default_sample_seed()
+    return size, fraction, seed
+
+
+@lru_cache
+def _default_sample_seed() -> int:
+    # Chosen once per process, so every class samples with the same seed.
+    import random
+
+    return random.randrange(2**32)
+
+
+def _sample_test_names(
+    test_names: list[str],
+    size: int | None,
+    fraction: float | None,
+    rng: random.Random,
+) -> list[str]:
+    count = len(test_names)
+    if fraction is not None:
+        count = math.ceil(count * fraction)
+    if size is not None:
+        count = min(count, size)
+
+    # Reservoir sampling, keeping positions to restore the original order.
+    reservoir: list[tuple[int, str]] = []
+    for position, test_name in enumerate(test_names):
+        if position < count:
+            reservoir.append((position, test_name))
+        else:
+            replace = rng.randrange(position + 1)
+            if replace < count:
+                reservoir[replace] = (position, test_name)
+    return [test_name for _, test_name in sorted(reservoir)]
+
+
+def _shard_option(cls: type[ParametrizedTestCase]) -> tuple[int, int] | None:
+    index = _option(cls, "shard_index", _getenv_int)
+    count = _option(cls, "shard_count", _getenv_int)
+
+    if index is None and count is None:
+        return None
+    if index is None or count is None:
+        raise ValueError("Both shard index and shard count must be set to shard tests")
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index {index} out of range for shard count {count}")
+    return index, count
+
+
+def _getenv_str(name: str) -> str | None:
+    return os.environ.get(name) or None
+
+
+def _getenv_flag(name: str) -> bool:
+    return os.environ.get(name) == "1"
+
+
+def _getenv_int(name: str) -> int | None:
+    value = os.environ.get(name, "")
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, not {value!r}") from None
+
+
+def _getenv_float(name: str) -> float | None:
+    value = os.environ.get(name, "")
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, not {value!r}") from None
+
+
+def _in_shard(test_name: str, index: int, count: int) -> bool:
+    # A stable hash, unlike hash(), which is randomized per process.
+    return zlib.crc32(test_name.encode()) % count == index
+
+
+def _profile_option() -> bool | Literal["aggregate"]:
+    value = os.environ.get("UNITTEST_PARAMETRIZE_PROFILE", "")
+    if value == "":
+        return False
+    if value == "1":
+        return True
+    if value == "aggregate":
+        return "aggregate"
+    raise ValueError(
+        f"UNITTEST_PARAMETRIZE_PROFILE must be '1' or 'aggregate', not {value!r}"
+    )
+
+
+_UNCHANGED_REASON = "Unchanged since last passing run"
+
+
+def _case_fingerprint(func: FunctionType, params: dict[str, Any]) -> str | None:
+    # Changes to the test's source or parameter values change the fingerprint,
+    # but changes to code that the test calls do not.
+    import pickle
+
+    from unittest_parametrize import _cache
+
+    try:
+        values = _cache.stable_dumps(params)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return _cache.make_key(_test_fingerprint(func), values)
+
+
+@lru_cache
+def _test_fingerprint(func: FunctionType) -> bytes:
+    # Without the @parametrize decorator, which is always the top-most, so
+    # changing other parameter sets does not change the fingerprint.
+    from unittest_parametrize import _cache
+
+    return _cache.function_fingerprint(func, skip_decorators=1)
+
+
+def _is_unchanged(cls: type[TestCase], test_name: str, fingerprint: str | None) -> bool:
+    from unittest_parametrize import _incremental
+
+    return (
+        fingerprint is not None
+        and os.environ.get("UNITTEST_PARAMETRIZE_FORCE") != "1"
+        and _incremental.load(_incremental.path())
+        .get(_class_name(cls), {})
+        .get(test_name)
+        == fingerprint
+    )
+
+
+def _class_name(cls: type[TestCase]) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _run_case(
+    instance: TestCase,
+    func: FunctionType,
+    name: str,
+    _parametrized: parametrized,
+    case: param,
+    params: dict[str, Any],
+) -> AbstractContextManager[Callable[[Callable[[], Any]], Any]]:
+    # Enters with a function to call the test with, which applies its timeout.
+    settings: _Settings = instance._parametrize_settings  # type: ignore [attr-defined]
+    if (
+        settings.per_case
+        or _parametrized.max_failures is not None
+        or _parametrized.profile
+        or case.max_memory is not None
+        or _parametrized.max_memory is not None
+        or case.timeout is not None
+        or _parametrized.timeout is not None
+    ):
+        return _run_case_options(
+            instance, settings, func, name, _parametrized, case, params
+        )
+    # Most cases use no options, so skip the work of checking each one.
+    return _CaseNotes(params)
+
+
+class _CaseNotes:
+    # Adds the parameters to exceptions from cases without options.
+    __slots__ = ("params",)
+
+    def __init__(self, params: dict[str, Any]) -> None:
+        self.params = params
+
+    def __enter__(self) -> Callable[[Callable[[], Any]], Any]:
+        return _call
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if isinstance(exc, Exception) and not isinstance(exc, SkipTest):
+            _add_params_note(exc, self.params)
+
+
+@contextmanager
+def _run_case_options(
+    instance: TestCase,
+    settings: _Settings,
+    func: FunctionType,
+    name: str,
+    _parametrized: parametrized,
+    case: param,
+    params: dict[str, Any],
+) -> Generator[Callable[[Callable[[], Any]], Any]]:
+    skip_reason = _max_failures_reason(_parametrized, instance, name)
+    if skip_reason is not None:
+        raise SkipTest(skip_reason)
+
+    cls = type(instance)
+    test_name = f"{name}_{case.id}"
+    fingerprint = None
+    if settings.incremental:
+        fingerprint = _case_fingerprint(func, params)
+        if _is_unchanged(cls, test_name, fingerprint):
+            raise SkipTest(_UNCHANGED_REASON)
+
+    timings_file = settings.timings_file
+    report_file = settings.report_file
+    slowest = settings.slowest
+    sample = settings.sample
+    last_failed = settings.last_failed
+    profile = _parametrized.profile
+    if not profile and _parametrized.workers is None:
+        profile = settings.profile
+    profiler = None
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    max_memory = case.max_memory
+    if max_memory is None:
+        max_memory = _parametrized.max_memory
+    timeout = None
+    # Coroutines are timed out by _await_case(), on their event loop.
+    if not inspect.iscoroutinefunction(func):
+        timeout = _get_timeout(_parametrized, case)
+    memory_tracing = None
+    if max_memory is not None or (
+        _parametrized.workers is None and settings.trace_memory
+    ):
+        memory_tracing = _start_memory_tracing()
+    peak_bytes = None
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    # Whether the case failed, or None if it did not finish, such as skips.
+    failed = None
+    try:
+        with _timeout(instance, timeout) as call:
+            yield call
+        if memory_tracing is not None:
+            peak_bytes = _stop_memory_tracing(memory_tracing)
+            memory_tracing = None
+            if max_memory is not None and peak_bytes > max_memory:
+                raise instance.failureException(
+                    f"Peak memory of {peak_bytes:,} bytes exceeded max_memory of"
+                    + f" {max_memory:,} bytes"
+                )
+        failed = False
+    except SkipTest:
+        raise
+    except Exception as exc:
+        failed = True
+        _record_failure(_parametrized, instance, name, test_name)
+        _add_case_notes(exc, params, sample)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        cpu_seconds = time.thread_time() - cpu_start
+        if memory_tracing is not None:
+            peak_bytes = _stop_memory_tracing(memory_tracing)
+        if profiler is not None:
+            from unittest_parametrize import _profiles
+
+            profiler.disable()
+            if profile == "aggregate":
+                _profiles.aggregate(
+                    profiler,
+                    settings.profile_dir,
+                    f"{_class_name(cls)}.{name}.pstats",
+                )
+            else:
+                _profiles.dump(
+                    profiler,
+                    settings.profile_dir,
+                    f"{_class_name(cls)}.{name}_{case.id}.pstats",
+                )
+        if timings_file is not None or report_file is not None or slowest is not None:
+            from unittest_parametrize import _timings
+
+        if timings_file is not None:
+            _timings.record(timings_file, _class_name(cls), test_name, seconds)
+        if report_file is not None or slowest is not None:
+            _timings.record_case(
+                report_file,
+                slowest,
+                (
+                    _class_name(cls),
+                    name,
+                    str(case.id),
+                    seconds,
+                    cpu_seconds,
+                    peak_bytes,
+                ),
+            )
+        if last_failed is not None and failed is not None:
+            from unittest_parametrize import _last_failed
+
+            _last_failed.record(
+                _last_failed.path(), _class_name(cls), test_name, failed
+            )
+        if fingerprint is not None and failed is not None:
+            from unittest_parametrize import _incremental
+
+            _incremental.record(
+                _incremental.path(),
+                _class_name(cls),
+                test_name,
+                None if failed else fingerprint,
+            )
+
+
+def _add_case_notes(
+    exc: BaseException,
+    params: dict[str, Any],
+    sample: tuple[int | None, float | None, int] | None,
+) -> None:
+    _add_params_note(exc, params)
+    if sample is not None:
+        *_, seed = sample
+        _add_note(
+            exc,
+            f"Parameters sampled with seed {seed}, set"
+            + f" UNITTEST_PARAMETRIZE_SAMPLE_SEED={seed} to reproduce",
+        )
+
+
+def _start_memory_tracing() -> tuple[bool, int]:
+    import tracemalloc
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    current, _ = tracemalloc.get_traced_memory()
+    return started, current
+
+
+def _stop_memory_tracing(memory_tracing: tuple[bool, int]) -> int:
+    # Returns the peak memory allocated since tracing started.
+    import tracemalloc
+
+    started, baseline = memory_tracing
+    _, peak = tracemalloc.get_traced_memory()
+    if started:
+        tracemalloc.stop()
+    return max(peak - baseline, 0)
+
+
+class _ParametrizedTest:
+    # One generated test, stored by reference to the original function and the
+    # index of its param, to avoid keeping a wrapper function per param.
+    # Accessing it builds a wrapper function, so unittest and inspect see an
+    # ordinary function.
+    __slots__ = ("func", "index", "name")
+
+    def __init__(self, func: FunctionType, name: str, index: int) -> None:
+        self.func = func
+        self.name = name
+        self.index = index
+
+    @property
+    def case(self) -> param:
+        return self.func._parametrized.params[self.index]  # type: ignore [attr-defined,no-any-return]
+
+    @property
+    def __name__(self) -> str:
+        return f"{self.name}_{self.case.id}"
+
+    def __get__(self, instance: TestCase | None, owner: type[TestCase]) -> Any:
+        test = self._make_function()
+        if instance is None:
+            return test
+        # Skip before setUp() runs, once max_failures cases have failed, or for
+        # unchanged cases in incremental runs. Tests are looked up several
+        # times each, so only check when those options are used.
+        _parametrized = self.func._parametrized  # type: ignore [attr-defined]
+        if (
+            _parametrized.max_failures is not None
+            or instance._parametrize_settings.incremental  # type: ignore [attr-defined]
+        ):
+            reason = self._skip_reason(instance, _parametrized, test.__name__)
+            if reason is not None:
+                test.__unittest_skip__ = True
+                test.__unittest_skip_why__ = reason
+        return MethodType(test, instance)
+
+    def _make_function(self) -> Any:
+        def test(instance: TestCase, /, *args: Any, **kwargs: Any) -> Any:
+            return self(instance, *args, **kwargs)
+
+        return self._update_function(test)
+
+    def _update_function(self, test: Any) -> Any:
+        # Copy attributes like @wraps(func), which is slower, including those
+        # set by other decorators, such as @unittest.skip.
+        func = self.func
+        func_dict = func.__dict__
+        if len(func_dict) > 1:
+            test.__dict__.update(func_dict)
+            del test._parametrized
+        case_id = func_dict["_parametrized"].params[self.index].id
+        test.__module__ = func.__module__
+        test.__name__ = f"{self.name}_{case_id}"
+        test.__qualname__ = f"{func.__qualname__}_{case_id}"
+        test.__doc__ = func.__doc__
+        test.__wrapped__ = func
+        return test
+
+    def _skip_reason(
+        self, instance: TestCase, _parametrized: parametrized, test_name: str
+    ) -> str | None:
+        reason = _max_failures_reason(_parametrized, instance, self.name)
+        if reason is None and instance._parametrize_settings.incremental:  # type: ignore [attr-defined]
+            fingerprint = _case_fingerprint(
+                self.func, _get_params(_parametrized, self.case)
+            )
+            if _is_unchanged(type(instance), test_name, fingerprint):
+                reason = _UNCHANGED_REASON
+        return reason
+
+    def __call__(self, instance: TestCase, /, *args: Any, **kwargs: Any) -> Any:
+        _parametrized = self.func._parametrized  # type: ignore [attr-defined]
+        case = self.case
+        params = _get_params(_parametrized, case)
+        with _run_case(
+            instance, self.func, self.name, _parametrized, case, params
+        ) as call:
+            if _parametrized.mode == "benchmark":
+                from unittest_parametrize import _benchmarks
+
+                result = call(
+                    lambda: _benchmarks.run(
+                        lambda: self.func(instance, *args, **params, **kwargs)
+                    )
+                )
+                return _check_benchmark(instance, self.__name__, result)
+            return call(lambda: self.func(instance, *args, **params, **kwargs))
+
+
+class _AsyncParametrizedTest(_ParametrizedTest):
+    # A generated test for a coroutine function.
+    __slots__ = ()
+
+    def _make_function(self) -> Any:
+        async def test(instance: TestCase, /, *args: Any, **kwargs: Any) -> Any:
+            return await self(instance, *args, **kwargs)
+
+        return self._update_function(test)
+
+    async def __call__(self, instance: TestCase, /, *args: Any, **kwargs: Any) -> Any:
+        _parametrized = self.func._parametrized  # type: ignore [attr-defined]
+        case = self.case
+        params = _get_params(_parametrized, case)
+        with _run_case(instance, self.func, self.name, _parametrized, case, params):
+            if _parametrized.mode == "benchmark":
+                from unittest_parametrize import _benchmarks
+
+                result = await _await_case(
+                    instance,
+                    _benchmarks.run_async(
+                        lambda: self.func(instance, *args, **params, **kwargs)
+                    ),
+                    _get_timeout(_parametrized, case),
+                )
+                return _check_benchmark(instance, self.__name__, result)
+            return await _await_case(
+                instance,
+                self.func(instance, *args, **params, **kwargs),
+                _get_timeout(_parametrized, case),
+            )
+
+
+def _max_failures_reason(
+    _parametrized: parametrized, instance: TestCase, name: str
+) -> str | None:
+    if _parametrized.max_failures is None:
+        return None
+    failures = _case_failures(_parametrized, instance, name)
+    if failures is None or len(failures) < _parametrized.max_failures:
+        return None
+    return f"Skipped after {len(failures)} failures of {name}: " + ", ".join(failures)
+
+
+def _record_failure(
+    _parametrized: parametrized, instance: TestCase, name: str, test_name: str
+) -> None:
+    if _parametrized.max_failures is None:
+        return
+    failures = _case_failures(_parametrized, instance, name)
+    if failures is not None:
+        failures.append(test_name)
+
+
+def _case_failures(
+    _parametrized: parametrized, instance: TestCase, name: str
+) -> list[str] | None:
+    # Counted per run, from the result given to run(), and per class, since
+    # subclasses inherit parametrized tests. Tests run without a result, such
+    # as by debug(), are not counted.
+    result = getattr(instance, "_parametrize_result", None)
+    if result is None:
+        return None
+    return _parametrized.failures.setdefault(result, {}).setdefault(
+        (type(instance), name), []
+    )
+
+
+def _check_benchmark(
+    instance: TestCase, test_name: str, result: dict[str, float]
+) -> None:
+    from unittest_parametrize import _benchmarks
+
+    cls = type(instance)
+    class_name = _class_name(cls)
+    settings: _Settings = cls._parametrize_settings  # type: ignore [attr-defined]
+    results_file = settings.benchmark_file
+    if results_file is not None:
+        _benchmarks.record(results_file, class_name, test_name, result)
+
+    baseline_file = settings.benchmark_baseline
+    if baseline_file is None:
+        return
+    threshold = settings.benchmark_threshold
+    baseline = _benchmarks.load_baseline(baseline_file)
+    try:
+        old = baseline[class_name][test_name]["min"]
+    except KeyError:
+        return
+    new = result["min"]
+    if old and new / old > threshold:
+        raise instance.failureException(
+            f"Benchmark regressed: minimum time of {new:.6g}s is"
+            + f" {new / old:.2f}x the baseline of {old:.6g}s,"
+            + f" above the threshold of {threshold:.2f}x"
+        )
+
+
+def _make_subtest_test(
+    func: FunctionType, name: str, indices: list[int]
+) -> Callable[..., Any]:
+    _parametrized = func._parametrized  # type: ignore [attr-defined]
+
+    test: Callable[..., Any]
+    if inspect.iscoroutinefunction(func) and _parametrized.workers is not None:
+        import asyncio
+
+        @wraps(func)
+        async def test(self: TestCase, *args: Any, **kwargs: Any) -> None:
+            semaphore = asyncio.Semaphore(_parametrized.workers)
+
+            async def run(case: param) -> tuple[dict[str, Any], Exception | None]:
+                async with semaphore:
+                    params = _get_params(_parametrized, case)
+                    try:
+                        with _run_case(self, func, name, _parametrized, case, params):
+                            await _await_case(
+                                self,
+                                func(self, *args, **params, **kwargs),
+                                _get_timeout(_parametrized, case),
+                            )
+                    except Exception as exc:
+                        return params, exc
+                    return params, None
+
+            results = await asyncio.gather(
+                *(run(_parametrized.params[index]) for index in indices)
+            )
+            _report_subtests(self, results)
+
+    elif _parametrized.workers is not None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        @wraps(func)
+        def test(self: TestCase, *args: Any, **kwargs: Any) -> None:
+            def run(case: param) -> tuple[dict[str, Any], Exception | None]:
+                params = _get_params(_parametrized, case)
+                try:
+                    with _run_case(
+                        self, func, name, _parametrized, case, params
+                    ) as call:
+                        call(lambda: func(self, *args, **params, **kwargs))
+                except Exception as exc:
+                    return params, exc
+                return params, None
+
+            with ThreadPoolExecutor(max_workers=_parametrized.workers) as executor:
+                futures = [
+                    executor.submit(run, _parametrized.params[index])
+                    for index in indices
+                ]
+            _report_subtests(self, [future.result() for future in futures])
+
+    elif inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def test(self: TestCase, *args: Any, **kwargs: Any) -> None:
+            for index in indices:
+                param = _parametrized.params[index]
+                params = _get_params(_parametrized, param)
+                with (
+                    self.subTest(**params),
+                    _run_case(self, func, name, _parametrized, param, params),
+                ):
+                    await _await_case(
+                        self,
+                        func(self, *args, **params, **kwargs),
+                        _get_timeout(_parametrized, param),
                     )
 
-                setattr(cls, test.__name__, test)
+    else:
+
+        @wraps(func)
+        def test(self: TestCase, *args: Any, **kwargs: Any) -> None:
+            for index in indices:
+                param = _parametrized.params[index]
+                params = _get_params(_parametrized, param)
+                with (
+                    self.subTest(**params),
+                    _run_case(self, func, name, _parametrized, param, params) as call,
+                ):
+                    call(partial(func, self, *args, **params, **kwargs))
+
+    # Copied by @wraps, but the test must not be parametrized again.
+    del test._parametrized  # type: ignore [attr-defined]
+    return test
+
+
+def _get_timeout(_parametrized: parametrized, case: param) -> float | None:
+    if case.timeout is not None:
+        return case.timeout
+    return _parametrized.timeout
+
+
+@contextmanager
+def _timeout(
+    instance: TestCase, timeout: float | None
+) -> Generator[Callable[[Callable[[], Any]], Any]]:
+    # Yields a function to call the test with.
+    if timeout is None:
+        yield _call
+        return
+
+    if threading.current_thread() is threading.main_thread() and hasattr(
+        signal, "setitimer"
+    ):
+        # Raise from wherever the test is stuck, so the traceback shows it.
+        def handler(signum: int, frame: Any) -> None:
+            raise instance.failureException(f"Timed out after {timeout:g} seconds")
+
+        previous = signal.signal(signal.SIGALRM, handler)
+        start = time.monotonic()
+        outer_delay, outer_interval = signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            yield _call
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+            if outer_delay:
+                # Restore a timer set around the test, less the time it took.
+                signal.setitimer(
+                    signal.ITIMER_REAL,
+                    max(outer_delay - (time.monotonic() - start), 1e-6),
+                    outer_interval,
+                )
+        return
+
+    # Other threads cannot be interrupted, so the test runs in its own thread,
+    # which is given up on if it times out.
+    yield partial(_call_in_thread, instance, timeout)
+
+
+def _call(function: Callable[[], T]) -> T:
+    return function()
+
+
+def _call_in_thread(instance: TestCase, timeout: float, function: Callable[[], T]) -> T:
+    outcome: list[tuple[Any, BaseException | None]] = []
+
+    def run() -> None:
+        try:
+            outcome.append((function(), None))
+        except BaseException as exc:
+            outcome.append((None, exc))
+
+    thread = threading.Thread(target=run, name="unittest-parametrize", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        # Daemon threads do not stop the process exiting, so it can be left.
+        frame = sys._current_frames().get(thread.ident)  # type: ignore [arg-type]
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        raise instance.failureException(
+            f"Timed out after {timeout:g} seconds, in:\n{stack}"
+        )
+    result, exc = outcome[0]
+    if exc is not None:
+        raise exc
+    return result  # type: ignore [no-any-return]
+
+
+async def _await_case(
+    instance: TestCase, awaitable: Awaitable[T], timeout: float | None
+) -> T:
+    if timeout is None:
+        return await awaitable
+    import asyncio
+
+    try:
+        if sys.version_info >= (3, 11):
+            async with asyncio.timeout(timeout):
+                return await awaitable
+        else:
+            return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as exc:
+        # Chained, so the traceback shows where the test was stuck.
+        raise instance.failureException(f"Timed out after {timeout:g} seconds") from exc
+
+
+def _get_params(_parametrized: parametrized, param: param) -> dict[str, Any]:
+    return dict(zip(_parametrized.argnames, param._values()))
+
+
+def _report_subtests(
+    instance: TestCase, results: list[tuple[dict[str, Any], Exception | None]]
+) -> None:
+    # subTest() is not safe to use concurrently, so report afterwards.
+    for params, exc in results:
+        with instance.subTest(**params):
+            if exc is not None:
+                raise exc
+
+
+def _add_params_note(exc: BaseException, params: dict[str, Any]) -> None:
+    _add_note(
+        exc, "Test parameters: " + ", ".join(f"{k}={v!r}" for k, v in params.items())
+    )
+
+
+def _add_note(exc: BaseException, note: str) -> None:
+    if sys.version_info >= (3, 11):
+        exc.add_note(note)
 
 
 class param:
-    __slots__ = ("args", "id")
+    __slots__ = ("args", "id", "max_memory", "timeout")
 
-    def __init__(self, *args: Any, id: str | None = None) -> None:
+    def __init__(
+        self,
+        *args: Any,
+        id: str | None = None,
+        max_memory: int | str | None = None,
+        timeout: float | None = None,
+    ) -> None:
         self.args = args
 
         if id is not None and not f"_{id}".isidentifier():
             raise ValueError(f"id must be a valid Python identifier suffix: {id!r}")
 
         self.id = id
+        self.max_memory = _parse_memory(max_memory)
+        _check_timeout(timeout)
+        self.timeout = timeout
+
+    @staticmethod
+    def lazy(
+        *factories: Callable[[], Any],
+        id: str | None = None,
+        max_memory: int | str | None = None,
+        timeout: float | None = None,
+    ) -> param:
+        for factory in factories:
+            if not callable(factory):
+                raise TypeError(f"param.lazy() arguments must be callable: {factory!r}")
+        return _LazyParam(*factories, id=id, max_memory=max_memory, timeout=timeout)
+
+    def _values(self) -> tuple[Any, ...]:
+        return self.args
+
+
+class _LazyParam(param):
+    # Holds factories in args, which build the values each time the test runs,
+    # so large values are not kept alive between runs.
+    __slots__ = ()
+
+    def _values(self) -> tuple[Any, ...]:
+        return tuple(factory() for factory in self.args)
 
 
 class parametrized:
-    __slots__ = ("argnames", "params")
+    __slots__ = (
+        "argnames",
+        "failures",
+        "max_failures",
+        "max_memory",
+        "mode",
+        "params",
+        "profile",
+        "timeout",
+        "workers",
+    )
 
-    def __init__(self, argnames: Sequence[str], params: Sequence[param]) -> None:
+    def __init__(
+        self,
+        argnames: Sequence[str],
+        params: Sequence[param],
+        mode: Literal["methods", "subtest", "benchmark"] = "methods",
+        workers: int | None = None,
+        profile: bool | Literal["aggregate"] = False,
+        max_memory: int | str | None = None,
+        max_failures: int | None = None,
+        timeout: float | None = None,
+    ) -> None:
         self.argnames = argnames
         self.params = params
+        self.mode = mode
+        self.workers = workers
+        self.profile = profile
+        self.max_memory = _parse_memory(max_memory)
+        self.max_failures = max_failures
+        self.timeout = timeout
+        # Names of failed cases per run, class, and method, for max_failures.
+        self.failures: weakref.WeakKeyDictionary[
+            TestResult, dict[tuple[type[TestCase], str], list[str]]
+        ] = weakref.WeakKeyDictionary()
 
 
 P = ParamSpec("P")
 T = TypeVar("T")
 TestFunc = Callable[P, T]
+TestCaseT = TypeVar("TestCaseT", bound=type[TestCase])
 
 
-def parametrize(
-    argnames: str | Sequence[str],
-    argvalues: Sequence[tuple[Any, ...] | param | Any],
-    ids: Sequence[str | None] | Callable[[Any], str | None] | None = None,
-) -> Callable[[Callable[P, T]], Callable[P, T]]:
-    if isinstance(argnames, str):
-        argnames = [a.strip() for a in argnames.split(",")]
+class parametrize:
+    __slots__ = ("_parametrized",)
 
-    if len(argnames) == 0:
-        raise ValueError("argnames must contain at least one element")
+    def __init__(
+        self,
+        argnames: str | Sequence[str],
+        argvalues: Sequence[tuple[Any, ...] | param | Any],
+        ids: Sequence[str | None] | Callable[[Any], str | None] | None = None,
+        mode: Literal["methods", "subtest", "benchmark"] = "methods",
+        workers: int | None = None,
+        profile: bool | Literal["aggregate"] = False,
+        max_memory: int | str | None = None,
+        max_failures: int | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        argnames = _parse_argnames(argnames)
+        _check_options(mode, workers, profile, max_memory, max_failures, timeout)
 
-    ids_callable = callable(ids)
-    if ids is not None and not ids_callable and len(ids) != len(argvalues):  # type: ignore[arg-type]
-        raise ValueError("ids must have the same length as argvalues")
+        ids_callable = callable(ids)
+        if ids is not None and not ids_callable and len(ids) != len(argvalues):  # type: ignore[arg-type]
+            raise ValueError("ids must have the same length as argvalues")
 
-    seen_ids = set()
-    params = []
-    for i, argvalue in enumerate(argvalues):
-        if isinstance(argvalue, tuple):
-            if len(argvalue) != len(argnames):
-                raise ValueError(
-                    f"tuple at index {i} has wrong number of arguments "
-                    + f"({len(argvalue)} != {len(argnames)})"
-                )
-            argvalue = param(*argvalue, id=make_id(i, argvalue, ids))
-            params.append(argvalue)
-            seen_ids.add(argvalue.id)
-        elif isinstance(argvalue, param):
-            if len(argvalue.args) != len(argnames):
-                raise ValueError(
-                    f"param at index {i} has wrong number of arguments "
-                    + f"({len(argvalue.args)} != {len(argnames)})"
+        seen_ids = set()
+        params = []
+        for i, argvalue in enumerate(argvalues):
+            if isinstance(argvalue, tuple):
+                if len(argvalue) != len(argnames):
+                    raise ValueError(
+                        f"tuple at index {i} has wrong number of arguments "
+                        + f"({len(argvalue)} != {len(argnames)})"
+                    )
+                argvalue = param(*argvalue, id=make_id(i, argvalue, ids))
+                params.append(argvalue)
+                seen_ids.add(argvalue.id)
+            elif isinstance(argvalue, param):
+                if len(argvalue.args) != len(argnames):
+                    raise ValueError(
+                        f"param at index {i} has wrong number of arguments "
+                        + f"({len(argvalue.args)} != {len(argnames)})"
+                    )
+
+                if argvalue.id is None:
+                    argvalue = type(argvalue)(
+                        *argvalue.args,
+                        id=make_id(i, argvalue, ids),
+                        max_memory=argvalue.max_memory,
+                        timeout=argvalue.timeout,
+                    )
+                if argvalue.max_memory is not None and workers is not None:
+                    raise ValueError("max_memory cannot be used with workers")
+                if argvalue.id in seen_ids:
+                    raise ValueError(f"Duplicate param id {argvalue.id!r}")
+                seen_ids.add(argvalue.id)
+                params.append(argvalue)
+            elif len(argnames) == 1:
+                argvalue = param(argvalue, id=make_id(i, (argvalue,), ids))
+                seen_ids.add(argvalue.id)
+                params.append(argvalue)
+            else:
+                raise TypeError(
+                    f"argvalue at index {i} is not a tuple, param instance, or single value: {argvalue!r}"
                 )
 
-            if argvalue.id is None:
-                argvalue = param(*argvalue.args, id=make_id(i, argvalue, ids))
-            if argvalue.id in seen_ids:
-                raise ValueError(f"Duplicate param id {argvalue.id!r}")
-            seen_ids.add(argvalue.id)
-            params.append(argvalue)
-        elif len(argnames) == 1:
-            argvalue = param(argvalue, id=make_id(i, (argvalue,), ids))
-            seen_ids.add(argvalue.id)
-            params.append(argvalue)
+        self._parametrized = parametrized(
+            argnames,
+            params,
+            mode,
+            workers,
+            profile,
+            max_memory,
+            max_failures,
+            timeout,
+        )
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str | os.PathLike[str],
+        argnames: str | Sequence[str],
+        format: Literal["csv", "jsonl"] | None = None,
+        *,
+        ids: Callable[[Any], str | None] | None = None,
+        id_column: str | None = None,
+        mode: Literal["methods", "subtest", "benchmark"] = "methods",
+        workers: int | None = None,
+        profile: bool | Literal["aggregate"] = False,
+        max_memory: int | str | None = None,
+        max_failures: int | None = None,
+        timeout: float | None = None,
+    ) -> parametrize:
+        argnames = _parse_argnames(argnames)
+        _check_options(mode, workers, profile, max_memory, max_failures, timeout)
+        if ids is not None and id_column is not None:
+            raise ValueError("ids and id_column cannot both be given")
+
+        from unittest_parametrize import _files
+
+        rows = _files.FileRows(path, format, argnames, id_column)
+
+        file_ids: list[str] | None = None
+        if ids is not None or id_column is not None:
+            file_ids = []
+            seen_ids = set()
+            for i, row in enumerate(rows.scan()):
+                if id_column is not None:
+                    id_ = str(row[id_column])
+                    if not f"_{id_}".isidentifier():
+                        raise ValueError(
+                            f"id must be a valid Python identifier suffix: {id_!r}"
+                        )
+                else:
+                    id_ = make_id(i, tuple(row[name] for name in argnames), ids)
+                if id_ in seen_ids:
+                    raise ValueError(f"Duplicate param id {id_!r}")
+                seen_ids.add(id_)
+                file_ids.append(id_)
         else:
-            raise TypeError(
-                f"argvalue at index {i} is not a tuple, param instance, or single value: {argvalue!r}"
+            for _ in rows.scan():
+                pass
+
+        self = cls.__new__(cls)
+        self._parametrized = parametrized(
+            argnames,
+            _FileParams(rows, file_ids),
+            mode,
+            workers,
+            profile,
+            max_memory,
+            max_failures,
+            timeout,
+        )
+        return self
+
+    @classmethod
+    def product(
+        cls,
+        argvalues: Mapping[str, Sequence[Any]] | None = None,
+        /,
+        *,
+        ids: Callable[[Any], str | None] | None = None,
+        strength: int | None = None,
+        mode: Literal["methods", "subtest", "benchmark"] = "methods",
+        workers: int | None = None,
+        profile: bool | Literal["aggregate"] = False,
+        max_memory: int | str | None = None,
+        max_failures: int | None = None,
+        timeout: float | None = None,
+        **kwargs: Sequence[Any],
+    ) -> parametrize:
+        options: dict[str, Any] = {
+            "ids": ids,
+            "strength": strength,
+            "mode": mode,
+            "workers": workers,
+            "profile": profile,
+            "max_memory": max_memory,
+            "max_failures": max_failures,
+            "timeout": timeout,
+        }
+        for name, value in options.items():
+            # Options never take sequences, so this is a value list for an
+            # argument with the same name.
+            if isinstance(value, Sequence) and not isinstance(value, str):
+                raise TypeError(
+                    f"{name} is an option of product(), to parametrize an"
+                    + f" argument named {name}, pass a dict of arguments, like"
+                    + f" product({{{name!r}: [...]}})"
+                )
+        axes = dict(argvalues or {})
+        for name, values in kwargs.items():
+            if name in axes:
+                raise TypeError(f"product() got multiple values for {name!r}")
+            axes[name] = values
+        if not axes:
+            raise ValueError("product() requires at least one argument")
+        if strength is not None and strength < 1:
+            raise ValueError(f"strength must be at least 1, not {strength!r}")
+        _check_options(mode, workers, profile, max_memory, max_failures, timeout)
+
+        axis_ids = None
+        if ids is not None:
+            axis_ids = [
+                [_check_generated_id(_make_id_part(value, ids)) for value in values]
+                for values in axes.values()
+            ]
+
+        values = [list(axis) for axis in axes.values()]
+        rows = None
+        if strength is not None:
+            from unittest_parametrize import _combinations
+
+            rows = _combinations.covering_array(
+                [len(axis) for axis in values], strength
             )
 
-    _parametrized = parametrized(argnames, params)
-    bind_kwargs = dict.fromkeys(_parametrized.argnames)
+        self = cls.__new__(cls)
+        self._parametrized = parametrized(
+            list(axes),
+            _ProductParams(list(axes), values, axis_ids, rows),
+            mode,
+            workers,
+            profile,
+            max_memory,
+            max_failures,
+            timeout,
+        )
+        return self
+
+    @classmethod
+    def cached(
+        cls,
+        argnames: str | Sequence[str],
+        generator: Callable[..., Sequence[tuple[Any, ...] | param | Any]],
+        *args: Any,
+        ids: Sequence[str | None] | Callable[[Any], str | None] | None = None,
+        mode: Literal["methods", "subtest", "benchmark"] = "methods",
+        workers: int | None = None,
+        profile: bool | Literal["aggregate"] = False,
+        max_memory: int | str | None = None,
+        max_failures: int | None = None,
+        timeout: float | None = None,
+    ) -> parametrize:
+        import pickle
+
+        from unittest_parametrize import _cache
+
+        argnames = _parse_argnames(argnames)
+        _check_options(mode, workers, profile, max_memory, max_failures, timeout)
+
+        key = _params_cache_key(argnames, generator, args, ids)
+        if key is not None:
+            entries = _cache.load("params", key)
+            if entries is not None:
+                self = cls.__new__(cls)
+                self._parametrized = parametrized(
+                    argnames,
+                    [
+                        param(*values, id=id_, max_memory=max_memory_, timeout=timeout_)
+                        for values, id_, max_memory_, timeout_ in entries
+                    ],
+                    mode,
+                    workers,
+                    profile,
+                    max_memory,
+                    max_failures,
+                    timeout,
+                )
+                return self
+
+        self = cls(
+            argnames,
+            generator(*args),
+            ids,
+            mode,
+            workers,
+            profile,
+            max_memory,
+            max_failures,
+            timeout,
+        )
+        params = self._parametrized.params
+        # Lazy params hold factories, which are for building values at run time.
+        if key is not None and all(type(p) is param for p in params):
+            try:
+                _cache.store(
+                    "params",
+                    key,
+                    [(p.args, p.id, p.max_memory, p.timeout) for p in params],
+                )
+            except (pickle.PicklingError, TypeError, AttributeError):
+                # Values that cannot be pickled are generated on every import.
+                pass
+        return self
+
+    @overload
+    def __call__(self, func: TestCaseT) -> TestCaseT: ...
+
+    @overload
+    def __call__(self, func: Callable[P, T]) -> Callable[P, T]: ...
+
+    def __call__(self, func: Callable[P, T]) -> Callable[P, T]:
+        if isinstance(func, type):
+            return _parametrize_class(func, self._parametrized)
 
-    def wrapper(func: Callable[P, T]) -> Callable[P, T]:
         # Check given argnames will work
         sig = inspect.signature(func)
-        sig.bind_partial(**bind_kwargs)
+        sig.bind_partial(**dict.fromkeys(self._parametrized.argnames))
 
         if hasattr(func, "_parametrized"):
             raise TypeError(f"@parametrize cannot be stacked on {func.__qualname__}")
 
-        func._parametrized = _parametrized  # type: ignore [attr-defined]
+        func._parametrized = self._parametrized  # type: ignore [attr-defined]
         return func
 
-    return wrapper
+
+def _parametrize_class(cls: type[Any], _parametrized: parametrized) -> type[Any]:
+    if not issubclass(cls, ParametrizedTestCase):
+        raise TypeError(
+            f"@parametrize can only decorate ParametrizedTestCase subclasses, not {cls.__qualname__}"
+        )
+    if _parametrized.mode != "methods":
+        raise ValueError(f"@parametrize on {cls.__qualname__} requires mode='methods'")
+    if "_parametrized" in cls.__dict__:
+        raise TypeError(f"@parametrize cannot be stacked on {cls.__qualname__}")
+    # Include attributes that TestCase sets on instances, like _outcome.
+    reserved = set(dir(ParametrizedTestCase()))
+    for argname in _parametrized.argnames:
+        if argname in reserved:
+            raise ValueError(
+                f"@parametrize on {cls.__qualname__} cannot use the argument name"
+                + f" {argname!r}, which is a TestCase attribute"
+            )
+
+    module = sys.modules[cls.__module__]
+    names = [f"{cls.__name__}_{case.id}" for case in _parametrized.params]
+    for name in names:
+        # Classes from an earlier run of the same class statement, such as when
+        # reloading the module, are replaced.
+        previous = getattr(getattr(module, name, None), "_parametrized_base", None)
+        if hasattr(module, name) and (
+            previous is None or previous.__qualname__ != cls.__qualname__
+        ):
+            raise ValueError(
+                f"@parametrize on {cls.__qualname__} cannot add {name} to"
+                + f" module {module.__name__}, which already has an attribute"
+                + " with that name"
+            )
+    cls._parametrized = _parametrized  # type: ignore [attr-defined]
+
+    # Move tests to the subclasses, so they do not run without parameters on
+    # the decorated class. Inherited tests are hidden with None, which the
+    # loader skips.
+    tests = {}
+    for name in dir(cls):
+        if name.startswith("test") and callable(getattr(cls, name)):
+            tests[name] = inspect.getattr_static(cls, name)
+            if name in cls.__dict__:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, None)
+
+    # Inject subclasses into the module, for the loader to find them.
+    for name, case in zip(names, _parametrized.params):
+        subclass = type(
+            name,
+            (cls,),
+            {
+                "__module__": cls.__module__,
+                "__qualname__": name,
+                "_parametrized_base": cls,
+                **tests,
+                **_get_params(_parametrized, case),
+            },
+        )
+        setattr(module, name, subclass)
+    return cls
+
+
+_MEMORY_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 1000,
+    "MB": 1000**2,
+    "GB": 1000**3,
+    "KIB": 1024,
+    "MIB": 1024**2,
+    "GIB": 1024**3,
+}
+
+
+def _parse_memory(value: int | str | None) -> int | None:
+    # Parse a number of bytes, or a size like "200MB" or "1.5GiB".
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", value)
+    if match is None or match[2].upper() not in _MEMORY_UNITS:
+        raise ValueError(f"Invalid memory size: {value!r}")
+    return int(float(match[1]) * _MEMORY_UNITS[match[2].upper()])
+
+
+def _parse_argnames(argnames: str | Sequence[str]) -> Sequence[str]:
+    if isinstance(argnames, str):
+        argnames = [a.strip() for a in argnames.split(",")]
+
+    if len(argnames) == 0:
+        raise ValueError("argnames must contain at least one element")
+
+    return argnames
+
+
+def _params_cache_key(
+    argnames: Sequence[str],
+    generator: Callable[..., Any],
+    args: tuple[Any, ...],
+    ids: Sequence[str | None] | Callable[[Any], str | None] | None,
+) -> str | None:
+    # Keyed on the generator's source, so editing it invalidates the cache,
+    # and on its inputs.
+    import pickle
+
+    from unittest_parametrize import _cache
+
+    try:
+        inputs = pickle.dumps((list(argnames), args, None if callable(ids) else ids))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    parts = [_cache.function_fingerprint(generator), inputs]
+    if callable(ids):
+        parts.append(_cache.function_fingerprint(ids))
+    return _cache.make_key(*parts)
+
+
+def _check_options(
+    mode: str,
+    workers: int | None,
+    profile: bool | Literal["aggregate"],
+    max_memory: int | str | None,
+    max_failures: int | None,
+    timeout: float | None,
+) -> None:
+    if mode not in ("methods", "subtest", "benchmark"):
+        raise ValueError(
+            f"mode must be 'methods', 'subtest', or 'benchmark', not {mode!r}"
+        )
+
+    if workers is not None:
+        if mode != "subtest":
+            raise ValueError("workers requires mode='subtest'")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, not {workers!r}")
+
+    if profile not in (False, True, "aggregate"):
+        raise ValueError(
+            f"profile must be True, False, or 'aggregate', not {profile!r}"
+        )
+    if profile and workers is not None:
+        # Only one profiler can run at a time.
+        raise ValueError("profile cannot be used with workers")
+    if max_memory is not None and workers is not None:
+        # Memory is traced for the whole process, not per test.
+        raise ValueError("max_memory cannot be used with workers")
+    if max_failures is not None and max_failures < 1:
+        raise ValueError(f"max_failures must be at least 1, not {max_failures!r}")
+    _check_timeout(timeout)
+
+
+def _check_timeout(timeout: float | None) -> None:
+    if timeout is not None and not timeout > 0:
+        raise ValueError(f"timeout must be greater than 0, not {timeout!r}")
+
+
+class _FileParam(param):
+    # A row of a data file, read each time the test runs.
+    __slots__ = ("index", "rows")
+
+    def __init__(self, rows: _files.FileRows, index: int, id: str) -> None:
+        super().__init__(id=id)
+        self.rows = rows
+        self.index = index
+
+    def _values(self) -> tuple[Any, ...]:
+        return self.rows.values(self.index)
+
+
+class _FileParams(Sequence[param]):
+    def __init__(self, rows: _files.FileRows, ids: list[str] | None) -> None:
+        self.rows = rows
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @overload
+    def __getitem__(self, index: int) -> param: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[param]: ...
+
+    def __getitem__(self, index: int | slice) -> param | Sequence[param]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("param index out of range")
+        id_ = str(index) if self.ids is None else self.ids[index]
+        return _FileParam(self.rows, index, id_)
+
+
+class _ProductParams(Sequence[param]):
+    # Combinations of values from axes, with params built on demand. Without
+    # rows, the full cartesian product in the same order as
+    # itertools.product(), otherwise the rows of value positions given.
+    def __init__(
+        self,
+        argnames: list[str],
+        axes: list[list[Any]],
+        axis_ids: list[list[str]] | None,
+        rows: list[tuple[int, ...]] | None = None,
+    ) -> None:
+        self.argnames = argnames
+        self.axes = axes
+        self.axis_ids = axis_ids
+        self.rows = rows
+        if rows is None:
+            self.length = math.prod(len(values) for values in axes)
+        else:
+            self.length = len(rows)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[param]:
+        rows: Iterable[tuple[int, ...]]
+        if self.rows is None:
+            rows = itertools.product(*(range(len(values)) for values in self.axes))
+        else:
+            rows = self.rows
+        for index, positions in enumerate(rows):
+            yield self._make_param(index, positions)
+
+    @overload
+    def __getitem__(self, index: int) -> param: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[param]: ...
+
+    def __getitem__(self, index: int | slice) -> param | Sequence[param]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("param index out of range")
+        if self.rows is not None:
+            return self._make_param(index, self.rows[index])
+        positions = []
+        remainder = index
+        for values in reversed(self.axes):
+            remainder, position = divmod(remainder, len(values))
+            positions.append(position)
+        return self._make_param(index, tuple(reversed(positions)))
+
+    def _make_param(self, index: int, positions: tuple[int, ...]) -> param:
+        values = [axis[p] for axis, p in zip(self.axes, positions)]
+        if self.axis_ids is not None:
+            id_ = "_".join(ids[p] for ids, p in zip(self.axis_ids, positions))
+        elif self.rows is None:
+            id_ = str(index)
+        else:
+            # Name by value positions, which unlike indexes are stable when
+            # the rows change.
+            id_ = "_".join(f"{name}{p}" for name, p in zip(self.argnames, positions))
+        return param(*values, id=id_)
 
 
 def make_id(
@@ -187,24 +1707,31 @@ def make_id(
     if callable(ids):
         if isinstance(argvalue, tuple):
             values = argvalue
+        elif isinstance(argvalue, _LazyParam):
+            # Lazy values are not built until the test runs.
+            return str(i)
         else:
             values = argvalue.args
 
-        id_parts = []
-        for value in values:
-            id_part = ids(value)
-            if id_part is not None:
-                id_parts.append(id_part)
-            else:
-                id_parts.append(str(value))
-        id_ = "_".join(id_parts)
-        # Validate the generated ID
-        if not f"_{id_}".isidentifier():
-            raise ValueError(
-                f"callable ids returned invalid Python identifier suffix: {id_!r}"
-            )
-        return id_
+        return _check_generated_id(
+            "_".join(_make_id_part(value, ids) for value in values)
+        )
     elif ids and ids[i]:
         return str(ids[i])
     else:
         return str(i)
+
+
+def _make_id_part(value: Any, ids: Callable[[Any], str | None]) -> str:
+    id_part = ids(value)
+    if id_part is not None:
+        return id_part
+    return str(value)
+
+
+def _check_generated_id(id_: str) -> str:
+    if not f"_{id_}".isidentifier():
+        raise ValueError(
+            f"callable ids returned invalid Python identifier suffix: {id_!r}"
+        )
+    return id_
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from unittest_parametrize._store import Store
+
+ROUNDS = 5
+MIN_ROUND_SECONDS = 0.01
+
+# Results files map class names, like "module.Class", to test names to
+# statistics, with times in seconds per iteration.
+_store: Store[dict[str, float]] = Store()
+load_baseline = _store.load
+record = _store.record
+save = _store.save
+take = _store.take
+merge = _store.merge
+
+
+def run(call: Callable[[], Any]) -> dict[str, float]:
+    # Double the iterations per round until a round takes long enough to time
+    # accurately, which also warms up caches and lazy initialization.
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call()
+        if time.perf_counter() - start >= MIN_ROUND_SECONDS:
+            break
+        iterations *= 2
+
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call()
+        times.append((time.perf_counter() - start) / iterations)
+    return summarize(times, iterations)
+
+
+async def run_async(call: Callable[[], Awaitable[Any]]) -> dict[str, float]:
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await call()
+        if time.perf_counter() - start >= MIN_ROUND_SECONDS:
+            break
+        iterations *= 2
+
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await call()
+        times.append((time.perf_counter() - start) / iterations)
+    return summarize(times, iterations)
+
+
+def summarize(times: list[float], iterations: int) -> dict[str, float]:
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "stddev": statistics.stdev(times),
+        "rounds": len(times),
+        "iterations": iterations,
+    }
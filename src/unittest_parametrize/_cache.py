@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import inspect
+import io
+import marshal
+import os
+import pickle
+import sys
+import tempfile
+from collections.abc import Callable
+from typing import Any
+
+DEFAULT_DIR = ".unittest_parametrize_cache"
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def cache_dir() -> str:
+    return os.environ.get("UNITTEST_PARAMETRIZE_CACHE_DIR") or DEFAULT_DIR
+
+
+def max_size() -> int:
+    value = os.environ.get("UNITTEST_PARAMETRIZE_CACHE_MAX_SIZE", "")
+    if value == "":
+        return DEFAULT_MAX_SIZE
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(
+            f"UNITTEST_PARAMETRIZE_CACHE_MAX_SIZE must be an integer, not {value!r}"
+        ) from None
+
+
+def function_fingerprint(func: Callable[..., Any], skip_decorators: int = 0) -> bytes:
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        pass
+    else:
+        return _skip_decorators(source, skip_decorators).encode()
+    code = getattr(func, "__code__", None)
+    if code is not None:
+        return marshal.dumps(code)
+    return f"{func.__module__}.{func.__qualname__}".encode()
+
+
+def _skip_decorators(source: str, count: int) -> str:
+    # Remove the first count decorators from a function's source.
+    if count == 0:
+        return source
+    import ast
+    import textwrap
+
+    try:
+        tree = ast.parse(textwrap.dedent(source))
+    except SyntaxError:
+        # Source that is not a whole statement, such as a lambda within one.
+        return source
+    decorators = getattr(tree.body[0], "decorator_list", [])
+    if len(decorators) < count:
+        return source
+    return "".join(source.splitlines(keepends=True)[decorators[count - 1].end_lineno :])
+
+
+def stable_dumps(value: Any) -> bytes:
+    # Pickle with set members sorted, since their order depends on string
+    # hashes, which are randomized per process.
+    buffer = io.BytesIO()
+    _StablePickler(buffer, protocol=4).dump(value)
+    return buffer.getvalue()
+
+
+class _StablePickler(pickle.Pickler):
+    def persistent_id(self, obj: Any) -> Any:
+        if isinstance(obj, (set, frozenset)):
+            return (type(obj).__qualname__, sorted(map(stable_dumps, obj)))
+        return None
+
+
+def make_key(*parts: bytes) -> str:
+    digest = hashlib.sha256(sys.version.encode())
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def load(namespace: str, key: str) -> Any:
+    path = os.path.join(cache_dir(), namespace, f"{key}.pickle")
+    try:
+        with open(path, "rb") as fp:
+            value = pickle.load(fp)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or incompatible, so regenerate.
+        return None
+    # Mark as recently used, for eviction.
+    os.utime(path)
+    return value
+
+
+def store(namespace: str, key: str, value: Any) -> None:
+    directory = os.path.join(cache_dir(), namespace)
+    make_cache_dir(directory)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, os.path.join(directory, f"{key}.pickle"))
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    evict(directory, max_size())
+
+
+def make_cache_dir(directory: str) -> None:
+    root = cache_dir()
+    if not os.path.isdir(root):
+        os.makedirs(root, exist_ok=True)
+        # Avoid the cache being committed to version control.
+        with open(os.path.join(root, ".gitignore"), "w") as fp:
+            fp.write("# Created by unittest-parametrize automatically.\n*\n")
+    os.makedirs(directory, exist_ok=True)
+
+
+def evict(directory: str, max_size: int) -> None:
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".pickle"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                total += stat.st_size
+
+    # Remove least recently used entries first.
+    entries.sort(reverse=True)
+    while total > max_size:
+        _, path, size = entries.pop()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        total -= size
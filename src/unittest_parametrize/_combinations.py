@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import itertools
+
+
+def covering_array(sizes: list[int], strength: int) -> list[tuple[int, ...]]:
+    # Build rows of value indices, one per axis, that together contain every
+    # combination of values for any `strength` axes. Uses the greedy IPOG
+    # algorithm: start from the full product of the first axes, then add one
+    # axis at a time, extending each existing row with the value that covers
+    # the most new combinations, and adding rows for any left over.
+    if 0 in sizes:
+        return []
+    if strength >= len(sizes):
+        return list(itertools.product(*(range(size) for size in sizes)))
+
+    # Adding axes in decreasing size order gives smaller arrays.
+    order = sorted(range(len(sizes)), key=lambda axis: -sizes[axis])
+    ordered = [sizes[axis] for axis in order]
+
+    rows: list[list[int | None]] = [
+        list(row)
+        for row in itertools.product(*(range(size) for size in ordered[:strength]))
+    ]
+    for axis in range(strength, len(ordered)):
+        combos = list(itertools.combinations(range(axis), strength - 1))
+        uncovered = {
+            (combo, values, value)
+            for combo in combos
+            for values in itertools.product(*(range(ordered[a]) for a in combo))
+            for value in range(ordered[axis])
+        }
+
+        for row in rows:
+            best_value = 0
+            best_count = -1
+            for value in range(ordered[axis]):
+                count = sum(
+                    (combo, tuple(row[a] for a in combo), value) in uncovered
+                    for combo in combos
+                )
+                if count > best_count:
+                    best_value = value
+                    best_count = count
+            row.append(best_value)
+            for combo in combos:
+                uncovered.discard((combo, tuple(row[a] for a in combo), best_value))
+
+        # Unset values, marked None, can be set to cover later combinations.
+        new_rows: list[list[int | None]] = []
+        for combo, values, value in sorted(uncovered):
+            for row in new_rows:
+                if row[axis] == value and all(
+                    row[a] is None or row[a] == x for a, x in zip(combo, values)
+                ):
+                    break
+            else:
+                row = [None] * axis + [value]
+                new_rows.append(row)
+            for a, x in zip(combo, values):
+                row[a] = x
+        rows.extend(new_rows)
+
+    # Restore the original axis order, setting any unset values to the first.
+    positions = [order.index(axis) for axis in range(len(sizes))]
+    return [
+        tuple(0 if row[position] is None else row[position] for position in positions)  # type: ignore[misc]
+        for row in rows
+    ]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import mmap
+import os
+from array import array
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+class FileRows:
+    # Rows of a CSV or JSON Lines data file. Scanning records the byte offset
+    # of each row, so values can be re-read by index later, without keeping
+    # them in memory.
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        format: str | None,
+        argnames: Sequence[str],
+        id_column: str | None = None,
+    ) -> None:
+        # Absolute, since tests re-read rows when they run, perhaps after
+        # changing the working directory.
+        self.path = os.path.abspath(path)
+        if format is None:
+            extension = os.path.splitext(self.path)[1].lower()
+            try:
+                format = FORMATS[extension]
+            except KeyError:
+                raise ValueError(
+                    f"Cannot determine format of {self.path!r}, pass format='csv' or format='jsonl'"
+                ) from None
+        if format not in ("csv", "jsonl"):
+            raise ValueError(f"format must be 'csv' or 'jsonl', not {format!r}")
+        self.format = format
+        self.argnames = list(argnames)
+        self.columns = list(argnames)
+        if id_column is not None and id_column not in self.columns:
+            self.columns.append(id_column)
+        self.header: list[str] = []
+        self.offsets = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def scan(self) -> Iterator[dict[str, Any]]:
+        with open(self.path, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if self.format == "csv":
+                    yield from self.scan_csv(mm)
+                else:
+                    yield from self.scan_jsonl(mm)
+
+    def scan_csv(self, mm: mmap.mmap) -> Iterator[dict[str, Any]]:
+        if mm[: len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+            mm.seek(len(codecs.BOM_UTF8))
+        # Rows can span lines, with newlines in quoted values, so read them
+        # with one reader, which only takes lines as it needs them, so the
+        # position in the file is where the next row starts.
+        reader = csv.reader(line.decode() for line in iter(mm.readline, b""))
+        self.header = next(reader, [])
+        for column in self.columns:
+            if column not in self.header:
+                raise ValueError(
+                    f"Header of {self.path!r} is missing column {column!r}"
+                )
+
+        while True:
+            offset = mm.tell()
+            lineno = reader.line_num + 1
+            try:
+                fields = next(reader)
+            except StopIteration:
+                break
+            if not fields or (len(fields) == 1 and not fields[0].strip()):
+                continue
+            row = self.parse_csv(fields, f"Line {lineno}")
+            self.offsets.append(offset)
+            yield row
+
+    def scan_jsonl(self, mm: mmap.mmap) -> Iterator[dict[str, Any]]:
+        lineno = 0
+        while True:
+            offset = mm.tell()
+            line = mm.readline()
+            if not line:
+                break
+            lineno += 1
+            if not line.strip():
+                continue
+            row = self.parse_jsonl(line, f"Line {lineno}")
+            self.offsets.append(offset)
+            yield row
+
+    def parse_csv(self, fields: list[str], location: str) -> dict[str, Any]:
+        if len(fields) != len(self.header):
+            raise ValueError(
+                f"{location} of {self.path!r} has {len(fields)} fields,"
+                + f" expected {len(self.header)}"
+            )
+        return dict(zip(self.header, fields))
+
+    def parse_jsonl(self, line: bytes, location: str) -> dict[str, Any]:
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError(f"{location} of {self.path!r} is not a JSON object")
+        for column in self.columns:
+            if column not in row:
+                raise ValueError(
+                    f"{location} of {self.path!r} is missing key {column!r}"
+                )
+        return row
+
+    def values(self, index: int) -> tuple[Any, ...]:
+        with open(self.path, "rb") as fp:
+            offset = self.offsets[index]
+            fp.seek(offset)
+            location = f"Row at byte {offset}"
+            if self.format == "csv":
+                reader = csv.reader(line.decode() for line in fp)
+                row = self.parse_csv(next(reader), location)
+            else:
+                row = self.parse_jsonl(fp.readline(), location)
+        return tuple(row[name] for name in self.argnames)
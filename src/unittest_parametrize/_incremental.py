@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import os
+
+from unittest_parametrize import _cache
+from unittest_parametrize._store import Store
+
+# Incremental files map class names, like "module.Class", to test names to the
+# fingerprints of their last passing runs. Failing runs record None, to forget
+# their fingerprints.
+_store: Store[str] = Store(in_cache_dir=True)
+load = _store.load
+record = _store.record
+save = _store.save
+take = _store.take
+merge = _store.merge
+
+
+def path() -> str:
+    return os.path.join(_cache.cache_dir(), "incremental.json")
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from unittest_parametrize import _cache
+from unittest_parametrize._store import Store
+
+# Last failed files map class names, like "module.Class", to the names of their
+# parametrized tests that failed on their last run.
+LastFailed = dict[str, dict[str, bool]]
+
+
+class _LastFailedStore(Store[bool]):
+    # Stored as lists of test names, and held as test names to True.
+
+    def decode(self, data: Any) -> LastFailed:
+        return {
+            class_name: dict.fromkeys(test_names, True)
+            for class_name, test_names in data.items()
+        }
+
+    def encode(self, data: LastFailed) -> Any:
+        return {class_name: sorted(tests) for class_name, tests in data.items()}
+
+
+_store = _LastFailedStore(in_cache_dir=True)
+load = _store.load
+save = _store.save
+take = _store.take
+merge = _store.merge
+
+
+def path() -> str:
+    return os.path.join(_cache.cache_dir(), "lastfailed.json")
+
+
+def record(path: str, class_name: str, test_name: str, failed: bool) -> None:
+    # Passing tests are removed.
+    _store.record(path, class_name, test_name, True if failed else None)
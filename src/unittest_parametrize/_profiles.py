@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import atexit
+import cProfile
+import os
+import pstats
+import threading
+from typing import Any
+
+# Aggregated stats by path, saved when the process exits.
+_aggregated: dict[str, pstats.Stats] = {}
+_lock = threading.Lock()
+
+
+def dump(profiler: cProfile.Profile, directory: str, filename: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, filename))
+
+
+def aggregate(profiler: cProfile.Profile, directory: str, filename: str) -> None:
+    _add(os.path.join(directory, filename), profiler)
+
+
+def _add(path: str, profile: Any) -> None:
+    with _lock:
+        if not _aggregated:
+            atexit.register(save)
+        try:
+            _aggregated[path].add(profile)
+        except KeyError:
+            _aggregated[path] = pstats.Stats(profile)
+
+
+def take() -> dict[str, Any]:
+    # Aggregated stats, removed so they are not saved here, for the parallel
+    # runner's workers to send to its main process. Stats objects hold a
+    # stream, so only their data is sent.
+    with _lock:
+        stats = {path: stats.stats for path, stats in _aggregated.items()}  # type: ignore [attr-defined]
+        _aggregated.clear()
+        atexit.unregister(save)
+    return stats
+
+
+def merge(stats: dict[str, Any]) -> None:
+    for path, data in stats.items():
+        _add(path, _Profile(data))
+
+
+class _Profile:
+    # Loads stats data into pstats.Stats, like a profiler.
+
+    def __init__(self, stats: Any) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def save() -> None:
+    with _lock:
+        for path, stats in _aggregated.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            stats.dump_stats(path)
+        _aggregated.clear()
+        atexit.unregister(save)
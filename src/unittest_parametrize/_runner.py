@@ -0,0 +1,537 @@
+from __future__ import annotations
+
+import argparse
+import heapq
+import importlib
+import inspect
+import math
+import multiprocessing
+import os
+import sys
+import unittest
+from collections import deque
+from collections.abc import Iterator
+from multiprocessing.connection import Connection, wait
+from types import TracebackType
+from typing import Any
+
+from unittest_parametrize import (
+    _class_name,
+    _default_sample_seed,
+    _last_failed,
+    _ParametrizedTest,
+)
+
+# Tests for a worker to run: module name, class qualified name, and test
+# method names, all from the same class.
+Chunk = tuple[str, str, list[str]]
+
+# Tests are sent from workers as their id(), str(), and shortDescription().
+TestInfo = tuple[str, str, str | None]
+
+# Errors are sent from workers as whether they are failures, rather than
+# errors, and their formatted traceback.
+ErrorInfo = tuple[bool, str]
+
+# Calls to replay on the result, like ("addSkip", test_info, reason).
+Event = tuple[Any, ...]
+
+# Modules that save records when the process exits. Workers are ended with
+# os._exit(), so they send their records to the main process to save instead.
+RECORDING_MODULES = [
+    "_benchmarks",
+    "_incremental",
+    "_last_failed",
+    "_profiles",
+    "_timings",
+]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m unittest_parametrize",
+        description="Run tests in parallel processes, splitting parametrized tests"
+        + " between them.",
+    )
+    parser.add_argument(
+        "tests",
+        nargs="*",
+        help="modules, classes, or test methods to run, like python -m unittest,"
+        + " rather than discovering tests",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="maximum number of tests to send to a worker at once",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="verbosity",
+        action="store_const",
+        const=2,
+        default=1,
+        help="verbose output",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        dest="verbosity",
+        action="store_const",
+        const=0,
+        help="quiet output",
+    )
+    parser.add_argument(
+        "-f",
+        "--failfast",
+        action="store_true",
+        help="stop on the first error or failure",
+    )
+    parser.add_argument(
+        "-b",
+        "--buffer",
+        action="store_true",
+        help="buffer stdout and stderr during tests",
+    )
+    parser.add_argument(
+        "-s",
+        "--start-directory",
+        default=".",
+        help="directory to start discovery from, defaults to '.'",
+    )
+    parser.add_argument(
+        "-p",
+        "--pattern",
+        default="test*.py",
+        help="pattern to match test files, defaults to 'test*.py'",
+    )
+    parser.add_argument(
+        "-t",
+        "--top-level-directory",
+        help="top level directory of the project, defaults to the start directory",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error(f"--jobs must be at least 1, not {args.jobs}")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error(f"--chunk-size must be at least 1, not {args.chunk_size}")
+
+    # Workers load tests again, so they must sample the same parameters.
+    os.environ.setdefault(
+        "UNITTEST_PARAMETRIZE_SAMPLE_SEED", str(_default_sample_seed())
+    )
+
+    loader = unittest.TestLoader()
+    if args.tests:
+        suite = loader.loadTestsFromNames(args.tests)
+    else:
+        suite = loader.discover(
+            args.start_directory, args.pattern, args.top_level_directory
+        )
+
+    runner = unittest.TextTestRunner(
+        verbosity=args.verbosity,
+        failfast=args.failfast,
+        buffer=args.buffer,
+        resultclass=_RemoteResult,  # type: ignore [arg-type]
+    )
+    result = runner.run(
+        _DistributedSuite(  # type: ignore [arg-type]
+            list(_iter_tests(suite)), args.jobs, args.chunk_size
+        )
+    )
+    return 0 if result.wasSuccessful() else 1
+
+
+def _iter_tests(suite: unittest.TestSuite) -> Iterator[unittest.TestCase]:
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
+
+
+class _DistributedSuite:
+    # Called by TextTestRunner.run() with its result, like a test suite.
+
+    def __init__(
+        self, tests: list[unittest.TestCase], jobs: int, chunk_size: int | None
+    ) -> None:
+        self.tests = tests
+        self.jobs = jobs
+        self.chunk_size = chunk_size
+
+    def __call__(self, result: unittest.TestResult) -> None:
+        classes: dict[type[unittest.TestCase], list[unittest.TestCase]] = {}
+        loadable: dict[type[unittest.TestCase], bool] = {}
+        local = []
+        for test in self.tests:
+            cls = type(test)
+            if cls not in loadable:
+                loadable[cls] = _is_loadable(test)
+            if loadable[cls]:
+                classes.setdefault(cls, []).append(test)
+            else:
+                local.append(test)
+
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            # Several chunks per worker, so idle workers can steal some.
+            total = sum(len(tests) for tests in classes.values())
+            chunk_size = max(1, math.ceil(total / (self.jobs * 4)))
+        class_chunks = [
+            _make_chunks(cls, tests, chunk_size) for cls, tests in classes.items()
+        ]
+        if class_chunks:
+            _Scheduler(class_chunks, self.jobs, result).run()
+
+        # Tests that workers cannot load by name, such as those for modules
+        # that failed to import, run in this process.
+        if local and not result.shouldStop:
+            unittest.TestSuite(local).run(result)
+
+
+def _is_loadable(test: unittest.TestCase) -> bool:
+    # Check workers can recreate the test from its class and method names,
+    # unlike unittest's tests for failed imports, or doctests.
+    cls = type(test)
+    try:
+        obj: Any = importlib.import_module(cls.__module__)
+        for part in cls.__qualname__.split("."):
+            obj = getattr(obj, part)
+        return obj is cls and cls(test._testMethodName).id() == test.id()
+    except Exception:
+        return False
+
+
+def _make_chunks(
+    cls: type[unittest.TestCase], tests: list[unittest.TestCase], chunk_size: int
+) -> list[Chunk]:
+    settings = getattr(cls, "_parametrize_settings", None)
+    if settings is not None and settings.last_failed == "first":
+        failed = _last_failed.load(_last_failed.path()).get(_class_name(cls), {})
+        tests = sorted(tests, key=lambda test: test._testMethodName not in failed)
+
+    # Split along parametrized methods, keeping other tests together.
+    methods: dict[str | None, list[str]] = {}
+    for test in tests:
+        name = test._testMethodName
+        attr = inspect.getattr_static(cls, name, None)
+        method = attr.name if isinstance(attr, _ParametrizedTest) else None
+        methods.setdefault(method, []).append(name)
+
+    return [
+        (cls.__module__, cls.__qualname__, names[start : start + chunk_size])
+        for names in methods.values()
+        for start in range(0, len(names), chunk_size)
+    ]
+
+
+class _Scheduler:
+    # Runs chunks in worker processes. Each class's chunks are queued for one
+    # worker, so it sets up the class once, and workers that run out of
+    # chunks steal from the end of the fullest queue.
+
+    def __init__(
+        self, class_chunks: list[list[Chunk]], jobs: int, result: unittest.TestResult
+    ) -> None:
+        self.result = result
+        workers = min(jobs, sum(len(chunks) for chunks in class_chunks))
+        self.queues: list[deque[Chunk]] = [deque() for _ in range(workers)]
+        self.sizes = [0] * workers
+
+        # Assign the largest classes first, to the least loaded worker.
+        loads = [(0, index) for index in range(workers)]
+        for chunks in sorted(
+            class_chunks, key=lambda chunks: -sum(len(c[2]) for c in chunks)
+        ):
+            size, index = heapq.heappop(loads)
+            self.queues[index].extend(chunks)
+            self.sizes[index] += sum(len(chunk[2]) for chunk in chunks)
+            heapq.heappush(loads, (self.sizes[index], index))
+
+    def run(self) -> None:
+        context = multiprocessing.get_context()
+        processes = []
+        # Workers' indexes, processes, chunks, and names of finished tests.
+        running: dict[Connection, tuple[int, Any, Chunk | None, set[str]]] = {}
+
+        def start(index: int) -> None:
+            chunk = self.next_chunk(index)
+            if chunk is None:
+                return
+            conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_work,
+                args=(child_conn, getattr(self.result, "buffer", False)),
+            )
+            process.start()
+            processes.append(process)
+            child_conn.close()
+            conn.send(chunk)
+            running[conn] = (index, process, chunk, set())
+
+        try:
+            for index in range(len(self.queues)):
+                start(index)
+            while running:
+                for conn in wait(list(running)):
+                    assert isinstance(conn, Connection)
+                    index, process, chunk, finished = running.pop(conn)
+                    try:
+                        events, records, done = conn.recv()
+                    except EOFError:
+                        # The worker exited, such as from a crash, so
+                        # report its test and replace it.
+                        conn.close()
+                        process.join()
+                        self.report_exit(index, chunk, finished, process.exitcode)
+                        if chunk is not None:
+                            start(index)
+                        continue
+
+                    _replay(events, self.result)
+                    _merge_records(records)
+                    if not done:
+                        finished.update(
+                            info[0] for name, info, *_ in events if name == "stopTest"
+                        )
+                        running[conn] = (index, process, chunk, finished)
+                        continue
+                    if chunk is None:
+                        # Finished tearing down.
+                        conn.close()
+                        process.join()
+                        continue
+                    chunk = self.next_chunk(index)
+                    conn.send(chunk)
+                    running[conn] = (index, process, chunk, set())
+        finally:
+            # Stop any workers left running by an error, such as an interrupt.
+            for process in processes:
+                process.kill()
+                process.join()
+
+    def next_chunk(self, index: int) -> Chunk | None:
+        if self.result.shouldStop:
+            return None
+        if self.queues[index]:
+            chunk = self.queues[index].popleft()
+        else:
+            victim = max(range(len(self.queues)), key=lambda i: self.sizes[i])
+            if not self.queues[victim]:
+                return None
+            index = victim
+            chunk = self.queues[index].pop()
+        self.sizes[index] -= len(chunk[2])
+        return chunk
+
+    def report_exit(
+        self, index: int, chunk: Chunk | None, finished: set[str], exitcode: int | None
+    ) -> None:
+        error_info = (False, f"Worker process exited with code {exitcode}\n")
+        names = []
+        if chunk is not None:
+            module_name, qualname, chunk_names = chunk
+            names = [
+                name
+                for name in chunk_names
+                if f"{module_name}.{qualname}.{name}" not in finished
+            ]
+        if not names:
+            # Exited outside of a test, such as while tearing down fixtures,
+            # so report like unittest reports fixture errors, without starting
+            # a test.
+            info = ("tearDown", "tearDown (worker process)", None)
+            _replay([("addError", info, error_info)], self.result)
+            return
+
+        # Tests run in order, so the first unfinished test was running. Queue
+        # the rest for the replacement worker.
+        info = (
+            f"{module_name}.{qualname}.{names[0]}",
+            f"{names[0]} ({module_name}.{qualname})",
+            None,
+        )
+        _replay(
+            [
+                ("startTest", info),
+                ("addError", info, error_info),
+                ("stopTest", info),
+            ],
+            self.result,
+        )
+        if len(names) > 1:
+            self.queues[index].appendleft((module_name, qualname, names[1:]))
+            self.sizes[index] += len(names) - 1
+
+
+def _work(conn: Connection, buffer: bool) -> None:
+    # Forked workers copy any records of the main process, which saves them.
+    _take_records()
+    result = _RecordingResult(conn)
+    result.buffer = buffer
+    # Run chunks as parts of one test run, so unittest only tears down class
+    # and module fixtures when the next test needs a different class.
+    result._testRunEntered = True  # type: ignore [attr-defined]
+    while True:
+        chunk = conn.recv()
+        if chunk is None:
+            break
+        module_name, qualname, names = chunk
+        cls: Any = importlib.import_module(module_name)
+        for part in qualname.split("."):
+            cls = getattr(cls, part)
+        unittest.TestSuite([cls(name) for name in names]).run(result)
+        result.send(done=True)
+
+    # Run as a whole test run, to tear down the last class and module.
+    result._testRunEntered = False  # type: ignore [attr-defined]
+    unittest.TestSuite().run(result)
+    result.send(done=True)
+    conn.close()
+
+
+def _take_records() -> dict[str, Any]:
+    # From the modules in use, to avoid importing the others.
+    records = {}
+    for name in RECORDING_MODULES:
+        module = sys.modules.get(f"unittest_parametrize.{name}")
+        if module is not None:
+            records[name] = module.take()
+    return records
+
+
+def _merge_records(records: dict[str, Any]) -> None:
+    for name, module_records in records.items():
+        importlib.import_module(f"unittest_parametrize.{name}").merge(module_records)
+
+
+class _RecordingResult(unittest.TestResult):
+    # Records results as events to replay in the main process, sent after
+    # each test, so the main process knows which tests finished if the worker
+    # exits.
+
+    def __init__(self, conn: Connection) -> None:
+        super().__init__()
+        self.conn = conn
+        self.events: list[Event] = []
+
+    def send(self, done: bool) -> None:
+        # done marks the end of a chunk, for the main process to send another.
+        self.conn.send((self.events, _take_records(), done))
+        self.events = []
+
+    def startTest(self, test: unittest.TestCase) -> None:
+        super().startTest(test)
+        self.events.append(("startTest", _describe(test)))
+
+    def stopTest(self, test: unittest.TestCase) -> None:
+        super().stopTest(test)
+        self.events.append(("stopTest", _describe(test)))
+        self.send(done=False)
+
+    def addSuccess(self, test: unittest.TestCase) -> None:
+        self.events.append(("addSuccess", _describe(test)))
+
+    def addError(self, test: unittest.TestCase, err: Any) -> None:
+        self.events.append(("addError", _describe(test), self.error_info(err, test)))
+
+    def addFailure(self, test: unittest.TestCase, err: Any) -> None:
+        self.events.append(("addFailure", _describe(test), self.error_info(err, test)))
+
+    def addSkip(self, test: unittest.TestCase, reason: str) -> None:
+        self.events.append(("addSkip", _describe(test), reason))
+
+    def addExpectedFailure(self, test: unittest.TestCase, err: Any) -> None:
+        self.events.append(
+            ("addExpectedFailure", _describe(test), self.error_info(err, test))
+        )
+
+    def addUnexpectedSuccess(self, test: unittest.TestCase) -> None:
+        self.events.append(("addUnexpectedSuccess", _describe(test)))
+
+    def addSubTest(
+        self, test: unittest.TestCase, subtest: unittest.TestCase, err: Any
+    ) -> None:
+        self.events.append(
+            (
+                "addSubTest",
+                _describe(test),
+                _describe(subtest),
+                None if err is None else self.error_info(err, test),
+            )
+        )
+
+    def addDuration(self, test: unittest.TestCase, elapsed: float) -> None:
+        self.events.append(("addDuration", _describe(test), elapsed))
+
+    def error_info(
+        self,
+        err: tuple[type[BaseException], BaseException, TracebackType | None],
+        test: unittest.TestCase,
+    ) -> ErrorInfo:
+        # Class and module fixture errors have no failureException.
+        failure_exception = getattr(test, "failureException", None)
+        return (
+            failure_exception is not None and issubclass(err[0], failure_exception),
+            self._exc_info_to_string(err, test),  # type: ignore [attr-defined]
+        )
+
+
+def _describe(test: unittest.TestCase) -> TestInfo:
+    return (test.id(), str(test), test.shortDescription())
+
+
+class _RemoteTest:
+    # Stands in for a test that ran in a worker.
+    failureException = AssertionError
+
+    def __init__(self, id: str, description: str, short_description: str | None):
+        self._id = id
+        self.description = description
+        self.short_description = short_description
+
+    def id(self) -> str:
+        return self._id
+
+    def __str__(self) -> str:
+        return self.description
+
+    def shortDescription(self) -> str | None:
+        return self.short_description
+
+
+class _RemoteResult(unittest.TextTestResult):
+    def _exc_info_to_string(self, err: Any, test: unittest.TestCase) -> str:
+        # Errors from workers are already formatted.
+        if isinstance(err[1], str):
+            return err[1]
+        return super()._exc_info_to_string(err, test)  # type: ignore [misc,no-any-return]
+
+
+def _replay(events: list[Event], result: unittest.TestResult) -> None:
+    for name, info, *args in events:
+        test = _RemoteTest(*info)
+        if name == "addSubTest":
+            subtest_info, error_info = args
+            args = [_RemoteTest(*subtest_info), _remote_error(error_info)]
+        elif name in ("addError", "addFailure", "addExpectedFailure"):
+            args = [_remote_error(args[0])]
+        getattr(result, name)(test, *args)
+
+
+def _remote_error(
+    error_info: ErrorInfo | None,
+) -> tuple[type[BaseException], str, None] | None:
+    if error_info is None:
+        return None
+    failure, text = error_info
+    return (AssertionError if failure else Exception, text, None)
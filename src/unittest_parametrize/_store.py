@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class Store(Generic[V]):
+    # A JSON file per path, mapping class names, like "module.Class", to test
+    # names to values. Recorded values are merged into the files at exit,
+    # under a lock, so processes saving to the same file keep each other's
+    # values. Recording None removes a test's value.
+
+    def __init__(self, in_cache_dir: bool = False) -> None:
+        self.in_cache_dir = in_cache_dir
+        self._loaded: dict[str, dict[str, dict[str, V]]] = {}
+        self._recorded: dict[str, dict[str, dict[str, V | None]]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> dict[str, dict[str, V]]:
+        with self._lock:
+            try:
+                return self._loaded[path]
+            except KeyError:
+                pass
+            data = self._read(path)
+            self._loaded[path] = data
+            return data
+
+    def _read(self, path: str) -> dict[str, dict[str, V]]:
+        try:
+            with open(path) as fp:
+                return self.decode(json.load(fp))
+        except FileNotFoundError:
+            return {}
+
+    def decode(self, data: Any) -> dict[str, dict[str, V]]:
+        decoded: dict[str, dict[str, V]] = data
+        return decoded
+
+    def encode(self, data: dict[str, dict[str, V]]) -> Any:
+        return data
+
+    def record(
+        self, path: str, class_name: str, test_name: str, value: V | None
+    ) -> None:
+        with self._lock:
+            if not self._recorded:
+                atexit.register(self.save)
+            self._recorded.setdefault(path, {}).setdefault(class_name, {})[
+                test_name
+            ] = value
+
+    def take(self) -> dict[str, dict[str, dict[str, V | None]]]:
+        # Recorded values, removed so they are not saved here, for the parallel
+        # runner's workers to send to its main process.
+        with self._lock:
+            recorded = self._recorded
+            self._recorded = {}
+            atexit.unregister(self.save)
+            return recorded
+
+    def merge(self, recorded: dict[str, dict[str, dict[str, V | None]]]) -> None:
+        for path, classes in recorded.items():
+            for class_name, tests in classes.items():
+                for test_name, value in tests.items():
+                    self.record(path, class_name, test_name, value)
+
+    def save(self) -> None:
+        with self._lock:
+            for path, recorded in self._recorded.items():
+                if self.in_cache_dir:
+                    from unittest_parametrize import _cache
+
+                    _cache.make_cache_dir(os.path.dirname(path))
+                with _locked(path):
+                    data = self._read(path)
+                    for class_name, tests in recorded.items():
+                        class_data = data.setdefault(class_name, {})
+                        for test_name, value in tests.items():
+                            if value is None:
+                                class_data.pop(test_name, None)
+                            else:
+                                class_data[test_name] = value
+                        if not class_data:
+                            del data[class_name]
+                    write(
+                        path,
+                        json.dumps(self.encode(data), indent=2, sort_keys=True) + "\n",
+                    )
+            self._recorded.clear()
+            atexit.unregister(self.save)
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    # Lock a separate file, since writing replaces the file at path.
+    with open(f"{path}.lock", "a+") as fp:
+        if sys.platform == "win32":  # pragma: no cover
+            import msvcrt
+
+            fp.seek(0)
+            # Retries for 10 seconds before raising OSError.
+            msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fp, fcntl.LOCK_EX)
+        # Closing the file releases the lock.
+        yield
+
+
+def write(path: str, content: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fp:
+            fp.write(content)
+        # mkstemp() creates files only readable by their owner, so use the
+        # mode that open() would, for files that are shared.
+        os.chmod(temp_path, 0o666 & ~_umask())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _umask() -> int:
+    # Only readable by setting it, so set it back.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
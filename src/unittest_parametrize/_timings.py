@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import atexit
+import csv
+import heapq
+import io
+import json
+import statistics
+import sys
+import threading
+import zlib
+from typing import Any
+
+from unittest_parametrize._store import Store, write
+
+# Per-case measurements: class name, method name, param id, wall time and CPU
+# time in seconds, and peak memory in bytes, if traced.
+Case = tuple[str, str, str, float, float, int | None]
+
+REPORT_FIELDS = ["class", "method", "id", "wall_seconds", "cpu_seconds", "peak_bytes"]
+
+# Timings files map class names, like "module.Class", to test names to seconds.
+_store: Store[float] = Store()
+load = _store.load
+record = _store.record
+save = _store.save
+
+_cases: dict[str | None, list[Case]] = {}
+_slowest = 0
+_lock = threading.Lock()
+
+
+def record_case(path: str | None, slowest: int | None, case: Case) -> None:
+    # Record a case for the report file at path, if any, and the summary of
+    # the slowest cases.
+    global _slowest
+    with _lock:
+        if not _cases:
+            atexit.register(report)
+        _cases.setdefault(path, []).append(case)
+        if slowest is not None:
+            _slowest = max(_slowest, slowest)
+
+
+def report() -> None:
+    global _slowest
+    with _lock:
+        for path, cases in _cases.items():
+            if path is not None:
+                write(path, _format_report(path, cases))
+        if _slowest:
+            _print_slowest(
+                [case for cases in _cases.values() for case in cases], _slowest
+            )
+        _cases.clear()
+        _slowest = 0
+        atexit.unregister(report)
+
+
+def take() -> Any:
+    # Recorded timings and cases, removed so they are not saved here, for the
+    # parallel runner's workers to send to its main process.
+    global _slowest
+    with _lock:
+        cases = dict(_cases)
+        slowest = _slowest
+        _cases.clear()
+        _slowest = 0
+        atexit.unregister(report)
+    return _store.take(), cases, slowest
+
+
+def merge(records: Any) -> None:
+    recorded, cases, slowest = records
+    _store.merge(recorded)
+    for path, path_cases in cases.items():
+        for case in path_cases:
+            record_case(path, slowest or None, case)
+
+
+def _format_report(path: str, cases: list[Case]) -> str:
+    rows = [dict(zip(REPORT_FIELDS, case)) for case in cases]
+    if path.endswith(".csv"):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, REPORT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue()
+    return json.dumps(rows, indent=2) + "\n"
+
+
+def _print_slowest(cases: list[Case], count: int) -> None:
+    cases = sorted(cases, key=lambda case: -case[3])[:count]
+    print(f"\nSlowest {len(cases)} parametrized tests:", file=sys.stderr)
+    for class_name, method, id_, seconds, cpu_seconds, _ in cases:
+        print(
+            f"{seconds:8.3f}s wall {cpu_seconds:8.3f}s CPU"
+            + f"  {class_name}.{method}_{id_}",
+            file=sys.stderr,
+        )
+
+
+def shard_test_names(
+    class_name: str,
+    test_names: list[str],
+    index: int,
+    count: int,
+    timings: dict[str, float],
+) -> set[str] | None:
+    # Assign tests to shards by greedy bin-packing on their durations, longest
+    # first. Returns None if no tests have timings, to fall back to hashing.
+    known = [timings[name] for name in test_names if name in timings]
+    if not known:
+        return None
+    # Assume tests without timings, such as new ones, take a typical duration.
+    default = statistics.median(known)
+
+    # Break ties between equally loaded shards from a per-class offset, so
+    # shard 0 is not favoured in every class.
+    offset = zlib.crc32(class_name.encode()) % count
+    shards = [(0.0, (shard - offset) % count, shard) for shard in range(count)]
+
+    selected = set()
+    for name in sorted(test_names, key=lambda n: (-timings.get(n, default), n)):
+        load, priority, shard = heapq.heappop(shards)
+        if shard == index:
+            selected.add(name)
+        heapq.heappush(shards, (load + timings.get(name, default), priority, shard))
+    return selected
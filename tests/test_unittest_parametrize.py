@@ -1,14 +1,47 @@
 from __future__ import annotations
 
 import asyncio
+import codecs
+import copy
+import inspect
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import pstats
+import re
+import runpy
+import signal
+import stat
+import subprocess
 import sys
+import threading
+import time
+import tracemalloc
 import unittest
-from types import SimpleNamespace
+import zlib
+from collections.abc import Callable
+from types import FunctionType, SimpleNamespace
+from typing import Any
 from unittest import IsolatedAsyncioTestCase, mock
 
 import pytest
 
-from unittest_parametrize import ParametrizedTestCase, param, parametrize
+from unittest_parametrize import (
+    ParametrizedTestCase,
+    _benchmarks,
+    _combinations,
+    _incremental,
+    _last_failed,
+    _profiles,
+    _runner,
+    _store,
+    _timings,
+    param,
+    parametrize,
+)
 
 
 def run_tests(test_case: type[ParametrizedTestCase]) -> unittest.TestResult:
@@ -75,6 +108,29 @@ def test_wrong_type_argvalues():
     )
 
 
+def test_invalid_mode():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], mode="tests")  # type: ignore[arg-type]
+
+    assert excinfo.value.args[0] == (
+        "mode must be 'methods', 'subtest', or 'benchmark', not 'tests'"
+    )
+
+
+def test_workers_without_subtest_mode():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], workers=2)
+
+    assert excinfo.value.args[0] == "workers requires mode='subtest'"
+
+
+def test_workers_too_few():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], mode="subtest", workers=0)
+
+    assert excinfo.value.args[0] == "workers must be at least 1, not 0"
+
+
 def test_wrong_argname():
     with pytest.raises(TypeError) as excinfo:
 
@@ -95,6 +151,23 @@ def test_param_invalid_id():
     assert excinfo.value.args[0] == "id must be a valid Python identifier suffix: '!'"
 
 
+def test_param_lazy_not_callable():
+    with pytest.raises(TypeError) as excinfo:
+        param.lazy(1)  # type: ignore[arg-type]
+
+    assert excinfo.value.args[0] == "param.lazy() arguments must be callable: 1"
+
+
+def test_param_lazy_wrong_length():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x,y", [param.lazy(list)])
+
+    assert (
+        excinfo.value.args[0]
+        == "param at index 0 has wrong number of arguments (1 != 2)"
+    )
+
+
 def test_duplicate_param_ids():
     with pytest.raises(ValueError) as excinfo:
         parametrize(
@@ -244,6 +317,88 @@ def test_parametrized_async_failure_has_note():
         assert message.endswith("\nTest parameters: x=1, expected=2\n")
 
 
+def test_generated_test_attributes():
+    class SquareTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2])
+        def test_square(self, x: int) -> None:  # pragma: no cover
+            """Square a number."""
+
+    test = SquareTests.test_square_1  # type: ignore[attr-defined]
+
+    assert test.__name__ == "test_square_1"
+    assert test.__qualname__ == (
+        "test_generated_test_attributes.<locals>.SquareTests.test_square_1"
+    )
+    assert test.__doc__ == "Square a number."
+    assert test.__module__ == __name__
+    assert type(test) is FunctionType
+    assert inspect.unwrap(test).__name__ == "test_square"
+    assert not inspect.iscoroutinefunction(test)
+    assert not inspect.iscoroutinefunction(SquareTests("test_square_1").test_square_1)  # type: ignore[attr-defined]
+
+
+def test_copy_generated_test():
+    class SquareTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2])
+        def test_square(self, x: int) -> None:
+            pass
+
+    test = copy.copy(SquareTests.__dict__["test_square_1"])
+    assert copy.copy(SquareTests.test_square_1).__name__ == "test_square_1"  # type: ignore[attr-defined]
+
+    SquareTests.test_square_copy = test  # type: ignore[attr-defined]
+    result = unittest.TestResult()
+    SquareTests("test_square_copy").run(result)
+    assert result.wasSuccessful()
+    assert result.testsRun == 1
+
+
+def test_load_generated_test_by_name():
+    class SquareTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2])
+        def test_square(self, x: int) -> None:
+            pass
+
+    # Load from the class, since it is not in a module.
+    suite = unittest.TestLoader().loadTestsFromName(
+        "test_square_1",
+        SquareTests,  # type: ignore [arg-type]
+    )
+
+    tests = list(suite)
+    assert len(tests) == 1
+    assert isinstance(tests[0], SquareTests)
+    assert tests[0]._testMethodName == "test_square_1"
+    result = unittest.TestResult()
+    suite.run(result)
+    assert result.wasSuccessful()
+    assert result.testsRun == 1
+
+
+def test_generated_test_attributes_async():
+    class SquareTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize("x", [1, 2])
+        async def test_square(self, x: int) -> None:  # pragma: no cover
+            pass
+
+    test = SquareTests.test_square_0  # type: ignore[attr-defined]
+
+    assert inspect.iscoroutinefunction(test)
+    assert inspect.iscoroutinefunction(SquareTests("test_square_0").test_square_0)  # type: ignore[attr-defined]
+
+
+def test_skip_decorator_beneath():
+    class SquareTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2])
+        @unittest.skip("not today")
+        def test_square(self, x: int) -> None:  # pragma: no cover
+            pass
+
+    result = run_tests(SquareTests)
+
+    assert len(result.skipped) == 2
+
+
 def test_single_parametrized():
     ran = 0
 
@@ -648,3 +803,3414 @@ def test_callable_ids_returning_none():
     assert not hasattr(Tests, "test_values")
     assert hasattr(Tests, "test_values_1_even2")
     assert hasattr(Tests, "test_values_3_even4")
+
+
+def test_import_does_not_load_optional_modules():
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, unittest_parametrize; print(' '.join(sys.modules))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+
+    for name in [
+        "asyncio",
+        "cProfile",
+        "concurrent.futures",
+        "csv",
+        "pickle",
+        "random",
+        "statistics",
+        "tracemalloc",
+        "unittest_parametrize._timings",
+    ]:
+        assert name not in output
+
+
+def test_subtest_mode():
+    ran = []
+
+    class SquareTests(ParametrizedTestCase):
+        @parametrize(
+            "x,expected",
+            [
+                (1, 1),
+                (2, 4),
+            ],
+            mode="subtest",
+        )
+        def test_square(self, x: int, expected: int) -> None:
+            ran.append(x)
+            self.assertEqual(x**2, expected)
+
+    result = run_tests(SquareTests)
+
+    assert result.wasSuccessful()
+    assert result.testsRun == 1
+    assert ran == [1, 2]
+    assert hasattr(SquareTests, "test_square")
+    assert not hasattr(SquareTests, "test_square_0")
+    assert not hasattr(SquareTests.test_square, "_parametrized")
+
+
+def test_subtest_mode_failure_has_note():
+    class SquareTests(ParametrizedTestCase):
+        @parametrize(
+            "x,expected",
+            [(1, 2), (2, 4), (3, 6)],
+            mode="subtest",
+        )
+        def test_square(self, x, expected):
+            self.assertEqual(x**2, expected)
+
+    result = run_tests(SquareTests)
+
+    assert len(result.failures) == 2
+    subtest, message = result.failures[0]
+    assert str(subtest).endswith("(x=1, expected=2)")
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: x=1, expected=2\n")
+        *_, message = result.failures[1]
+        assert message.endswith("\nTest parameters: x=3, expected=6\n")
+
+
+def test_subtest_mode_async():
+    ran = []
+
+    class SquareTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize(
+            "x,expected",
+            [(1, 1), (2, 5)],
+            mode="subtest",
+        )
+        async def test_square(self, x: int, expected: int) -> None:
+            ran.append(x)
+            await asyncio.sleep(0.001)
+            self.assertEqual(x**2, expected)
+
+    result = run_tests(SquareTests)
+
+    assert result.testsRun == 1
+    assert ran == [1, 2]
+    assert len(result.failures) == 1
+    if sys.version_info >= (3, 11):
+        *_, message = result.failures[0]
+        assert message.endswith("\nTest parameters: x=2, expected=5\n")
+
+
+def make_test_case(**attributes: Any) -> type[ParametrizedTestCase]:
+    # Options are read when the class is defined, so build it with type().
+    @parametrize("x", list(range(20)))
+    def test_square(self: ParametrizedTestCase, x: int) -> None:  # pragma: no cover
+        pass
+
+    @parametrize("x", [1, 2], ids=["one", "two"])
+    def test_cube(self: ParametrizedTestCase, x: int) -> None:  # pragma: no cover
+        pass
+
+    def test_plain(self: ParametrizedTestCase) -> None:  # pragma: no cover
+        pass
+
+    return type(
+        "SquareTests",
+        (ParametrizedTestCase,),
+        {
+            "test_square": test_square,
+            "test_cube": test_cube,
+            "test_plain": test_plain,
+            **attributes,
+        },
+    )
+
+
+ALL_TEST_NAMES = (
+    {f"test_square_{i}" for i in range(20)}
+    | {"test_cube_one", "test_cube_two"}
+    | {"test_plain"}
+)
+
+
+def loaded_test_names(test_case: type[ParametrizedTestCase]) -> set[str]:
+    return set(unittest.TestLoader().getTestCaseNames(test_case))
+
+
+def test_shard():
+    shards = [
+        loaded_test_names(
+            make_test_case(parametrize_shard_index=i, parametrize_shard_count=3)
+        )
+        for i in range(3)
+    ]
+
+    for names in shards:
+        assert "test_plain" in names
+        names.discard("test_plain")
+        assert 0 < len(names) < len(ALL_TEST_NAMES) - 1
+    assert shards[0] | shards[1] | shards[2] == ALL_TEST_NAMES - {"test_plain"}
+    assert not shards[0] & shards[1]
+    assert not shards[1] & shards[2]
+    assert not shards[0] & shards[2]
+    # Stable across class definitions
+    names = loaded_test_names(
+        make_test_case(parametrize_shard_index=1, parametrize_shard_count=3)
+    )
+    assert names - {"test_plain"} == shards[1]
+
+
+def test_shard_unselected_not_generated():
+    SquareTests = make_test_case(parametrize_shard_index=0, parametrize_shard_count=2)
+
+    names = loaded_test_names(SquareTests)
+
+    assert not hasattr(SquareTests, "test_square")
+    for name in ALL_TEST_NAMES:
+        assert (name in names) == hasattr(SquareTests, name)
+
+
+def test_shard_environment_variables():
+    with mock.patch.dict(
+        os.environ,
+        {
+            "UNITTEST_PARAMETRIZE_SHARD_INDEX": "1",
+            "UNITTEST_PARAMETRIZE_SHARD_COUNT": "3",
+        },
+    ):
+        names = loaded_test_names(make_test_case())
+
+    assert names == loaded_test_names(
+        make_test_case(parametrize_shard_index=1, parametrize_shard_count=3)
+    )
+
+
+def test_shard_environment_variables_empty():
+    with mock.patch.dict(
+        os.environ,
+        {
+            "UNITTEST_PARAMETRIZE_SHARD_INDEX": "",
+            "UNITTEST_PARAMETRIZE_SHARD_COUNT": "",
+        },
+    ):
+        names = loaded_test_names(make_test_case())
+
+    assert names == ALL_TEST_NAMES
+
+
+def test_shard_environment_variable_invalid():
+    with (
+        mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_SHARD_INDEX": "one"}),
+        pytest.raises(ValueError) as excinfo,
+    ):
+        make_test_case(parametrize_shard_count=3)
+
+    assert (
+        excinfo.value.args[0]
+        == "UNITTEST_PARAMETRIZE_SHARD_INDEX must be an integer, not 'one'"
+    )
+
+
+def test_shard_index_without_count():
+    with pytest.raises(ValueError) as excinfo:
+        make_test_case(parametrize_shard_index=1)
+
+    assert (
+        excinfo.value.args[0]
+        == "Both shard index and shard count must be set to shard tests"
+    )
+
+
+def test_shard_index_out_of_range():
+    with pytest.raises(ValueError) as excinfo:
+        make_test_case(parametrize_shard_index=3, parametrize_shard_count=3)
+
+    assert excinfo.value.args[0] == "Shard index 3 out of range for shard count 3"
+
+
+def test_shard_duplicate_test_name_outside_shard():
+    with pytest.raises(ValueError) as excinfo:
+
+        class SquareTests(ParametrizedTestCase):
+            parametrize_shard_index = 0
+            parametrize_shard_count = 100
+
+            @parametrize("x", [1], ids=["b_0"])
+            def test_a(self, x: int) -> None:  # pragma: no cover
+                pass
+
+            @parametrize("x", [1])
+            def test_a_b(self, x: int) -> None:  # pragma: no cover
+                pass
+
+    assert excinfo.value.args[0] == "Duplicate test name test_a_b_0 in SquareTests"
+
+
+def test_shard_subtest_mode():
+    ran = []
+
+    class SquareTests(ParametrizedTestCase):
+        parametrize_shard_index = 0
+        parametrize_shard_count = 2
+
+        @parametrize("x", list(range(20)), mode="subtest")
+        def test_square(self, x: int) -> None:
+            ran.append(x)
+
+    run_tests(SquareTests)
+
+    expected = {f"test_square_{i}" for i in range(20)} & loaded_test_names(
+        make_test_case(parametrize_shard_index=0, parametrize_shard_count=2)
+    )
+    assert {f"test_square_{x}" for x in ran} == expected
+
+
+def test_timings_recorded(tmp_path):
+    timings_file = tmp_path / "timings.json"
+
+    class SquareTests(ParametrizedTestCase):
+        parametrize_timings_file = str(timings_file)
+
+        @parametrize("x", [1, 2])
+        def test_square(self, x: int) -> None:
+            pass
+
+        @parametrize("x", [3], mode="subtest")
+        def test_cube(self, x: int) -> None:
+            pass
+
+    run_tests(SquareTests)
+    _timings.save()
+
+    timings = json.loads(timings_file.read_text())
+    assert list(timings) == [
+        "tests.test_unittest_parametrize.test_timings_recorded.<locals>.SquareTests"
+    ]
+    tests = timings[
+        "tests.test_unittest_parametrize.test_timings_recorded.<locals>.SquareTests"
+    ]
+    assert sorted(tests) == ["test_cube_0", "test_square_0", "test_square_1"]
+    assert all(isinstance(seconds, float) for seconds in tests.values())
+
+
+def test_timings_recorded_async_failure(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    timings_file.write_text(json.dumps({"other.Tests": {"test_x_0": 1.0}}))
+
+    with mock.patch.dict(
+        os.environ, {"UNITTEST_PARAMETRIZE_TIMINGS_FILE": str(timings_file)}
+    ):
+
+        class SquareTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+            @parametrize("x", [1])
+            async def test_square(self, x: int) -> None:
+                self.fail("bad")
+
+    result = run_tests(SquareTests)
+    _timings.save()
+
+    assert len(result.failures) == 1
+    timings = json.loads(timings_file.read_text())
+    assert timings["other.Tests"] == {"test_x_0": 1.0}
+    assert list(timings[full_class_name(SquareTests)]) == ["test_square_0"]
+
+
+def full_class_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def test_timings_file_mode(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    _timings.record(str(timings_file), "Tests", "test_x_0", 1.0)
+    umask = os.umask(0o022)
+    try:
+        _timings.save()
+    finally:
+        os.umask(umask)
+
+    assert stat.S_IMODE(timings_file.stat().st_mode) == 0o644
+
+
+def test_timings_save_failure_removes_temporary_file(tmp_path):
+    _timings.record(str(tmp_path / "timings.json"), "Tests", "test_x_0", 1.0)
+
+    with (
+        mock.patch("os.replace", side_effect=OSError("full")),
+        pytest.raises(OSError),
+    ):
+        _timings.save()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["timings.json.lock"]
+    _timings.save()
+
+
+def test_timings_save_waits_for_lock(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    _timings.record(str(timings_file), "Tests", "test_x_0", 1.0)
+
+    with _store._locked(str(timings_file)):
+        thread = threading.Thread(target=_timings.save)
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+        # Another process saves while this one waits.
+        timings_file.write_text(json.dumps({"Tests": {"test_x_1": 2.0}}))
+    thread.join()
+
+    assert json.loads(timings_file.read_text()) == {
+        "Tests": {"test_x_0": 1.0, "test_x_1": 2.0}
+    }
+
+
+def test_timings_shard_balancing(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    timings = {f"test_square_{i}": 1.0 for i in range(1, 20)}
+    timings["test_square_0"] = 20.0
+    # test_cube_* have no timings, so take the median.
+    timings_file.write_text(
+        json.dumps({f"{__name__}.SquareTests": timings}),
+    )
+
+    shards = [
+        loaded_test_names(
+            make_test_case(
+                parametrize_shard_index=i,
+                parametrize_shard_count=2,
+                parametrize_timings_file=str(timings_file),
+            )
+        )
+        for i in range(2)
+    ]
+
+    slow_shard, other_shard = shards if "test_square_0" in shards[0] else shards[::-1]
+    # 20 seconds of tests on each, plus the 22nd test on either.
+    assert len(slow_shard - {"test_plain"}) <= 2
+    assert len(other_shard - {"test_plain"}) >= 20
+    assert slow_shard & other_shard == {"test_plain"}
+    assert slow_shard | other_shard == ALL_TEST_NAMES
+
+
+def test_timings_shard_balancing_subtests(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    ran = []
+
+    def make_tests(index: int) -> type[ParametrizedTestCase]:
+        class SubTests(ParametrizedTestCase):
+            parametrize_shard_index = index
+            parametrize_shard_count = 2
+            parametrize_timings_file = str(timings_file)
+
+            @parametrize("x", [0, 1, 2, 3], mode="subtest")
+            def test_y(self, x: int) -> None:
+                ran.append((index, x))
+
+        return SubTests
+
+    timings_file.write_text(
+        json.dumps(
+            {
+                (
+                    "tests.test_unittest_parametrize"
+                    + ".test_timings_shard_balancing_subtests.<locals>"
+                    + ".make_tests.<locals>.SubTests"
+                ): {
+                    "test_y_0": 3.0,
+                    "test_y_1": 3.0,
+                    "test_y_2": 2.0,
+                    "test_y_3": 2.0,
+                }
+            }
+        )
+    )
+
+    for index in range(2):
+        run_tests(make_tests(index))
+    _timings.save()
+
+    assert sorted(x for _, x in ran) == [0, 1, 2, 3]
+    shard_of = {x: index for index, x in ran}
+    assert shard_of[0] != shard_of[1]
+    assert shard_of[2] != shard_of[3]
+
+
+def test_timings_shard_without_timings(tmp_path):
+    timings_file = tmp_path / "timings.json"
+    timings_file.write_text(json.dumps({"other.Tests": {"test_x_0": 8.0}}))
+
+    names = loaded_test_names(
+        make_test_case(
+            parametrize_shard_index=1,
+            parametrize_shard_count=3,
+            parametrize_timings_file=str(timings_file),
+        )
+    )
+
+    assert names == loaded_test_names(
+        make_test_case(parametrize_shard_index=1, parametrize_shard_count=3)
+    )
+    assert names == {"test_plain"} | {
+        name for name in ALL_TEST_NAMES - {"test_plain"} if _in_shard_hash(name, 1, 3)
+    }
+
+
+def _in_shard_hash(name: str, index: int, count: int) -> bool:
+    return zlib.crc32(name.encode()) % count == index
+
+
+def test_select_single():
+    SelectTests = make_test_case(parametrize_select="test_square_12")
+
+    assert loaded_test_names(SelectTests) == {"test_plain", "test_square_12"}
+    assert not hasattr(SelectTests, "test_square_1")
+    assert not hasattr(SelectTests, "test_cube_one")
+
+
+def test_select_glob():
+    names = loaded_test_names(make_test_case(parametrize_select="test_square_1*"))
+
+    assert names == {"test_plain", "test_square_1"} | {
+        f"test_square_{i}" for i in range(10, 20)
+    }
+
+
+def test_select_multiple():
+    names = loaded_test_names(
+        make_test_case(parametrize_select="test_square_2, test_cube_*")
+    )
+
+    assert names == {"test_plain", "test_square_2", "test_cube_one", "test_cube_two"}
+
+
+def test_select_environment_variable():
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_SELECT": "*_one"}):
+        names = loaded_test_names(make_test_case())
+
+    assert names == {"test_plain", "test_cube_one"}
+
+
+def test_select_environment_variable_empty():
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_SELECT": ""}):
+        names = loaded_test_names(make_test_case())
+
+    assert names == ALL_TEST_NAMES
+
+
+def test_select_with_shard():
+    names: set[str] = set()
+    for index in range(2):
+
+        class SelectTests(ParametrizedTestCase):
+            parametrize_select = "test_square_1*"
+            parametrize_shard_index = index
+            parametrize_shard_count = 2
+
+            @parametrize("x", list(range(20)))
+            def test_square(self, x: int) -> None:  # pragma: no cover
+                pass
+
+        shard_names = loaded_test_names(SelectTests)
+        assert not names & shard_names
+        names |= shard_names
+
+    assert names == {"test_square_1"} | {f"test_square_{i}" for i in range(10, 20)}
+
+
+def test_select_subtest_mode():
+    ran = []
+
+    class SelectTests(ParametrizedTestCase):
+        parametrize_select = "test_square_3"
+
+        @parametrize("x", list(range(5)), mode="subtest")
+        def test_square(self, x: int) -> None:
+            ran.append(x)
+
+    run_tests(SelectTests)
+
+    assert ran == [3]
+
+
+def test_subtest_mode_async_workers():
+    running = 0
+    max_running = 0
+    ran = []
+
+    class SleepTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize("x", list(range(7)), mode="subtest", workers=3)
+        async def test_sleep(self, x: int) -> None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            ran.append(x)
+
+    result = run_tests(SleepTests)
+
+    assert result.wasSuccessful()
+    assert result.testsRun == 1
+    assert sorted(ran) == list(range(7))
+    assert max_running == 3
+
+
+def test_subtest_mode_async_workers_failures():
+    class SquareTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize(
+            "x,expected",
+            [(1, 2), (2, 4), (3, 9), (4, 0)],
+            mode="subtest",
+            workers=4,
+        )
+        async def test_square(self, x: int, expected: int) -> None:
+            await asyncio.sleep(0.001)
+            if x == 3:
+                self.skipTest("three")
+            self.assertEqual(x**2, expected)
+
+    result = run_tests(SquareTests)
+
+    assert len(result.failures) == 2
+    assert len(result.skipped) == 1
+    subtest, message = result.failures[0]
+    assert str(subtest).endswith("(x=1, expected=2)")
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: x=1, expected=2\n")
+    subtest, message = result.failures[1]
+    assert str(subtest).endswith("(x=4, expected=0)")
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: x=4, expected=0\n")
+
+
+def test_subtest_mode_thread_workers():
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    ran = []
+
+    class SleepTests(ParametrizedTestCase):
+        @parametrize("x", list(range(7)), mode="subtest", workers=3)
+        def test_sleep(self, x: int) -> None:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+                ran.append(x)
+
+    result = run_tests(SleepTests)
+
+    assert result.wasSuccessful()
+    assert result.testsRun == 1
+    assert sorted(ran) == list(range(7))
+    assert max_running == 3
+
+
+def test_subtest_mode_thread_workers_failures():
+    class SquareTests(ParametrizedTestCase):
+        @parametrize(
+            "x,expected",
+            [(1, 2), (2, 4), (3, 9), (4, 0)],
+            mode="subtest",
+            workers=4,
+        )
+        def test_square(self, x: int, expected: int) -> None:
+            if x == 3:
+                self.skipTest("three")
+            self.assertEqual(x**2, expected)
+
+    result = run_tests(SquareTests)
+
+    assert len(result.failures) == 2
+    assert len(result.skipped) == 1
+    subtest, message = result.failures[0]
+    assert str(subtest).endswith("(x=1, expected=2)")
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: x=1, expected=2\n")
+    subtest, message = result.failures[1]
+    assert str(subtest).endswith("(x=4, expected=0)")
+
+
+def test_param_lazy():
+    built = []
+    ran = []
+
+    def make_data(size: int) -> Callable[[], list[int]]:
+        def factory() -> list[int]:
+            built.append(size)
+            return list(range(size))
+
+        return factory
+
+    class DataTests(ParametrizedTestCase):
+        @parametrize(
+            "data,expected",
+            [
+                param.lazy(make_data(3), lambda: 3),
+                param.lazy(make_data(5), lambda: 6, id="five"),
+                (list(range(2)), 2),
+            ],
+        )
+        def test_len(self, data: list[int], expected: int) -> None:
+            ran.append(data)
+            self.assertEqual(len(data), expected)
+
+    suite = unittest.TestLoader().loadTestsFromTestCase(DataTests)
+
+    assert built == []
+    assert hasattr(DataTests, "test_len_0")
+    assert hasattr(DataTests, "test_len_five")
+    assert hasattr(DataTests, "test_len_2")
+
+    result = unittest.TextTestRunner().run(suite)
+
+    assert built == [3, 5]
+    assert ran == [[0, 1, 2], [0, 1], [0, 1, 2, 3, 4]]
+    assert len(result.failures) == 1
+    if sys.version_info >= (3, 11):
+        *_, message = result.failures[0]
+        assert message.endswith("\nTest parameters: data=[0, 1, 2, 3, 4], expected=6\n")
+
+    run_tests(DataTests)
+
+    assert built == [3, 5, 3, 5]
+
+
+def test_param_lazy_ids():
+    class DataTests(ParametrizedTestCase):
+        @parametrize(
+            "x",
+            [param.lazy(lambda: 1), param.lazy(lambda: 2), 3],
+            ids=lambda value: f"num{value}",
+        )
+        def test_x(self, x: int) -> None:  # pragma: no cover
+            pass
+
+        @parametrize("x", [param.lazy(lambda: 1)], ids=["one"])
+        def test_y(self, x: int) -> None:  # pragma: no cover
+            pass
+
+    assert loaded_test_names(DataTests) == {
+        "test_x_0",
+        "test_x_1",
+        "test_x_num3",
+        "test_y_one",
+    }
+
+
+def test_param_lazy_subtest_mode():
+    ran = []
+
+    class DataTests(ParametrizedTestCase):
+        @parametrize(
+            "x", [param.lazy(lambda: 1), param.lazy(lambda: 2)], mode="subtest"
+        )
+        def test_x(self, x: int) -> None:
+            ran.append(x)
+
+        @parametrize(
+            "y",
+            [param.lazy(lambda: 3), param.lazy(lambda: 4)],
+            mode="subtest",
+            workers=2,
+        )
+        def test_y(self, y: int) -> None:
+            ran.append(y)
+
+    result = run_tests(DataTests)
+
+    assert result.wasSuccessful()
+    assert sorted(ran) == [1, 2, 3, 4]
+
+
+def test_from_file_csv(tmp_path):
+    path = tmp_path / "squares.csv"
+    path.write_text("x,expected,note\n1,1,a\n2,4,b\n\n3,10,c\n")
+    ran = []
+
+    class SquareTests(ParametrizedTestCase):
+        @parametrize.from_file(path, "x,expected")
+        def test_square(self, x: str, expected: str) -> None:
+            ran.append(x)
+            self.assertEqual(int(x) ** 2, int(expected))
+
+    result = run_tests(SquareTests)
+
+    assert ran == ["1", "2", "3"]
+    assert loaded_test_names(SquareTests) == {
+        "test_square_0",
+        "test_square_1",
+        "test_square_2",
+    }
+    assert len(result.failures) == 1
+    if sys.version_info >= (3, 11):
+        *_, message = result.failures[0]
+        assert message.endswith("\nTest parameters: x='3', expected='10'\n")
+
+
+def test_from_file_csv_quoted_newlines(tmp_path):
+    path = tmp_path / "lines.csv"
+    path.write_bytes(
+        codecs.BOM_UTF8 + b'text,count\r\n"one\r\ntwo",2\r\n\r\nthree,1\r\n'
+    )
+    ran = []
+
+    class LineTests(ParametrizedTestCase):
+        @parametrize.from_file(path, "text,count")
+        def test_lines(self, text: str, count: str) -> None:
+            ran.append(text)
+            self.assertEqual(len(text.splitlines()), int(count))
+
+    result = run_tests(LineTests)
+
+    assert result.wasSuccessful()
+    assert ran == ["one\r\ntwo", "three"]
+
+
+def test_from_file_relative_path(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "squares.csv").write_text("x,expected\n2,4\n")
+    monkeypatch.chdir(tmp_path)
+    ran = []
+
+    class SquareTests(ParametrizedTestCase):
+        def setUp(self) -> None:
+            os.chdir(tmp_path / "data")
+
+        @parametrize.from_file("data/squares.csv", "x,expected")
+        def test_square(self, x: str, expected: str) -> None:
+            ran.append(x)
+            self.assertEqual(int(x) ** 2, int(expected))
+
+    result = run_tests(SquareTests)
+
+    assert result.wasSuccessful()
+    assert ran == ["2"]
+
+
+def test_from_file_jsonl_id_column(tmp_path):
+    path = tmp_path / "squares.jsonl"
+    path.write_text(
+        '{"name": "one", "x": 1, "expected": 1}\n'
+        + "\n"
+        + '{"name": "two", "x": 2, "expected": 4}\n'
+    )
+    ran = []
+
+    class SquareTests(ParametrizedTestCase):
+        @parametrize.from_file(path, ["x", "expected"], id_column="name")
+        def test_square(self, x: int, expected: int) -> None:
+            ran.append(x)
+            self.assertEqual(x**2, expected)
+
+    result = run_tests(SquareTests)
+
+    assert result.wasSuccessful()
+    assert ran == [1, 2]
+    assert hasattr(SquareTests, "test_square_one")
+    assert hasattr(SquareTests, "test_square_two")
+
+
+def test_from_file_ids_callable(tmp_path):
+    path = tmp_path / "squares.ndjson"
+    path.write_text('{"x": 1}\n{"x": 2}\n')
+
+    class SquareTests(ParametrizedTestCase):
+        @parametrize.from_file(str(path), "x", ids=lambda value: f"num{value}")
+        def test_square(self, x: int) -> None:  # pragma: no cover
+            pass
+
+    assert loaded_test_names(SquareTests) == {"test_square_num1", "test_square_num2"}
+
+
+def test_from_file_id_column_in_argnames(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("x\na\nb\n")
+
+    class Tests(ParametrizedTestCase):
+        @parametrize.from_file(path, "x", id_column="x")
+        def test_x(self, x: str) -> None:  # pragma: no cover
+            pass
+
+    assert loaded_test_names(Tests) == {"test_x_a", "test_x_b"}
+
+
+def test_from_file_explicit_format(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text('{"x": 1}\n')
+    ran = []
+
+    class Tests(ParametrizedTestCase):
+        @parametrize.from_file(path, "x", format="jsonl", mode="subtest")
+        def test_x(self, x: int) -> None:
+            ran.append(x)
+
+    run_tests(Tests)
+
+    assert ran == [1]
+
+
+def test_from_file_empty(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("")
+
+    class Tests(ParametrizedTestCase):
+        @parametrize.from_file(path, "x")
+        def test_x(self, x: str) -> None:  # pragma: no cover
+            pass
+
+    assert loaded_test_names(Tests) == set()
+
+
+def test_from_file_params_sequence(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"x": 1}\n{"x": 2}\n{"x": 3}\n')
+
+    def test_x(self: unittest.TestCase, x: int) -> None:  # pragma: no cover
+        pass
+
+    params = parametrize.from_file(path, "x")(test_x)._parametrized.params  # type: ignore[attr-defined]
+
+    assert len(params) == 3
+    assert params[-1].id == "2"
+    assert params[-1]._values() == (3,)
+    assert [p.id for p in params[1:]] == ["1", "2"]
+    with pytest.raises(IndexError):
+        params[3]
+
+
+def test_from_file_unknown_format(tmp_path):
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.from_file(tmp_path / "data.txt", "x")
+
+    assert excinfo.value.args[0] == (
+        f"Cannot determine format of {str(tmp_path / 'data.txt')!r},"
+        + " pass format='csv' or format='jsonl'"
+    )
+
+
+def test_from_file_invalid_format(tmp_path):
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.from_file(tmp_path / "data.txt", "x", format="xml")  # type: ignore[arg-type]
+
+    assert excinfo.value.args[0] == "format must be 'csv' or 'jsonl', not 'xml'"
+
+
+def test_from_file_ids_and_id_column(tmp_path):
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.from_file(tmp_path / "data.csv", "x", ids=str, id_column="x")
+
+    assert excinfo.value.args[0] == "ids and id_column cannot both be given"
+
+
+@pytest.mark.parametrize(
+    "name,content,kwargs,message",
+    [
+        (
+            "data.csv",
+            "y\n1\n",
+            {},
+            "Header of {path!r} is missing column 'x'",
+        ),
+        (
+            "data.csv",
+            "x\n1,2\n",
+            {},
+            "Line 2 of {path!r} has 2 fields, expected 1",
+        ),
+        (
+            "data.csv",
+            'x\n"1\n2"\n1,2\n',
+            {},
+            "Line 4 of {path!r} has 2 fields, expected 1",
+        ),
+        (
+            "data.jsonl",
+            '{"x": 1}\n[1]\n',
+            {},
+            "Line 2 of {path!r} is not a JSON object",
+        ),
+        (
+            "data.jsonl",
+            '{"x": 1}\n\n{"y": 1}\n',
+            {},
+            "Line 3 of {path!r} is missing key 'x'",
+        ),
+        (
+            "data.jsonl",
+            '{"x": 1}\n',
+            {"id_column": "name"},
+            "Line 1 of {path!r} is missing key 'name'",
+        ),
+        (
+            "data.jsonl",
+            '{"x": 1, "name": "a"}\n{"x": 2, "name": "a"}\n',
+            {"id_column": "name"},
+            "Duplicate param id 'a'",
+        ),
+        (
+            "data.jsonl",
+            '{"x": 1, "name": "a b"}\n',
+            {"id_column": "name"},
+            "id must be a valid Python identifier suffix: 'a b'",
+        ),
+    ],
+)
+def test_from_file_invalid_data(tmp_path, name, content, kwargs, message):
+    path = tmp_path / name
+    path.write_text(content)
+
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.from_file(path, "x", **kwargs)
+
+    assert excinfo.value.args[0] == message.format(path=str(path))
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    with mock.patch.dict(
+        os.environ, {"UNITTEST_PARAMETRIZE_CACHE_DIR": str(tmp_path / "cache")}
+    ):
+        yield tmp_path / "cache"
+
+
+def test_cached(cache_dir):
+    calls = []
+
+    def make_cases(count):
+        calls.append(count)
+        return [(i, i * 2) for i in range(count)]
+
+    ran = []
+
+    def make_test_case() -> type[ParametrizedTestCase]:
+        class SquareTests(ParametrizedTestCase):
+            @parametrize.cached("x,expected", make_cases, 3)
+            def test_double(self, x: int, expected: int) -> None:
+                ran.append((x, expected))
+                self.assertEqual(x * 2, expected)
+
+        return SquareTests
+
+    run_tests(make_test_case())
+    test_case = make_test_case()
+
+    assert calls == [3]
+    assert hasattr(test_case, "test_double_2")
+    run_tests(test_case)
+    assert ran == [(0, 0), (1, 2), (2, 4)] * 2
+    assert (cache_dir / ".gitignore").read_text().endswith("*\n")
+    assert len(list((cache_dir / "params").iterdir())) == 1
+
+
+def test_cached_ids(cache_dir):
+    def make_cases():
+        return [("a", 1), ("b", 2)]
+
+    def make_test_case(
+        ids: list[str] | Callable[[Any], str],
+    ) -> type[ParametrizedTestCase]:
+        class IdTests(ParametrizedTestCase):
+            @parametrize.cached("x,y", make_cases, ids=ids)
+            def test_it(self, x: str, y: int) -> None:
+                pass
+
+        return IdTests
+
+    def make_id(value: Any) -> str:
+        return f"v{value}"
+
+    assert hasattr(make_test_case(make_id), "test_it_va_v1")
+    assert hasattr(make_test_case(["first", "second"]), "test_it_first")
+    test_case = make_test_case(make_id)
+    assert hasattr(test_case, "test_it_va_v1")
+    run_tests(test_case)
+    assert len(list((cache_dir / "params").iterdir())) == 2
+
+
+def test_cached_inputs_change(cache_dir):
+    calls = []
+
+    def make_cases(count):
+        calls.append(count)
+        return list(range(count))
+
+    assert len(parametrize.cached("x", make_cases, 2)._parametrized.params) == 2
+    assert len(parametrize.cached("x", make_cases, 3)._parametrized.params) == 3
+    assert len(parametrize.cached("x", make_cases, 2)._parametrized.params) == 2
+
+    assert calls == [2, 3]
+
+
+def test_cached_builtin_generator(cache_dir):
+    for _ in range(2):
+        params = parametrize.cached("x", range, 2)._parametrized.params
+        assert [(p.args, p.id) for p in params] == [((0,), "0"), ((1,), "1")]
+
+
+def test_cached_generator_without_source(cache_dir):
+    namespace: dict[str, Any] = {}
+    exec("def make_cases():\n    return [1, 2]\n", namespace)
+
+    for _ in range(2):
+        params = parametrize.cached("x", namespace["make_cases"])._parametrized.params
+        assert [p.args for p in params] == [(1,), (2,)]
+
+    assert len(list((cache_dir / "params").iterdir())) == 1
+
+
+def test_cached_lazy_params_not_stored(cache_dir):
+    def make_cases():
+        return [param.lazy(list, id="empty")]
+
+    parametrize.cached("x", make_cases)
+
+    assert not cache_dir.exists()
+
+
+def test_cached_unpicklable_values_not_stored(cache_dir):
+    calls = []
+
+    def make_cases() -> list[Callable[[], int]]:
+        calls.append(1)
+        return [lambda: 1]
+
+    parametrize.cached("x", make_cases)
+    parametrize.cached("x", make_cases)
+
+    assert calls == [1, 1]
+    assert list((cache_dir / "params").iterdir()) == []
+
+
+def test_cached_unpicklable_inputs(cache_dir):
+    def make_cases(func):
+        return [func()]
+
+    params = parametrize.cached("x", make_cases, lambda: 1)._parametrized.params
+
+    assert params[0].args == (1,)
+    assert not cache_dir.exists()
+
+
+def test_cached_corrupt_entry(cache_dir):
+    def make_cases():
+        return [1, 2]
+
+    parametrize.cached("x", make_cases)
+    (entry,) = (cache_dir / "params").iterdir()
+    entry.write_bytes(b"not a pickle")
+
+    params = parametrize.cached("x", make_cases)._parametrized.params
+
+    assert [p.args for p in params] == [(1,), (2,)]
+
+
+def test_cached_eviction(cache_dir):
+    def make_cases(value: int) -> list[int]:
+        return [value]
+
+    parametrize.cached("x", make_cases, 1)
+    (oldest,) = (cache_dir / "params").iterdir()
+    (cache_dir / "params" / "other.tmp").write_text("")
+    os.utime(oldest, (0, 0))
+    size = oldest.stat().st_size
+
+    with mock.patch.dict(
+        os.environ, {"UNITTEST_PARAMETRIZE_CACHE_MAX_SIZE": str(size * 2)}
+    ):
+        parametrize.cached("x", make_cases, 2)
+        parametrize.cached("x", make_cases, 3)
+
+    entries = list((cache_dir / "params").glob("*.pickle"))
+    assert len(entries) == 2
+    assert oldest not in entries
+
+
+def test_cached_invalid_max_size(cache_dir):
+    with (
+        mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_CACHE_MAX_SIZE": "big"}),
+        pytest.raises(ValueError) as excinfo,
+    ):
+        parametrize.cached("x", range, 1)
+
+    assert excinfo.value.args[0] == (
+        "UNITTEST_PARAMETRIZE_CACHE_MAX_SIZE must be an integer, not 'big'"
+    )
+
+
+def test_cached_invalid_mode():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.cached("x", range, 1, mode="other")  # type: ignore[arg-type]
+
+    assert excinfo.value.args[0] == (
+        "mode must be 'methods', 'subtest', or 'benchmark', not 'other'"
+    )
+
+
+def test_product():
+    ran = []
+
+    class ProductTests(ParametrizedTestCase):
+        @parametrize.product(x=[1, 2], y=["a", "b", "c"])
+        def test_it(self, x: int, y: str) -> None:
+            ran.append((x, y))
+
+    assert not hasattr(ProductTests, "test_it")
+    assert hasattr(ProductTests, "test_it_5")
+    assert not hasattr(ProductTests, "test_it_6")
+
+    run_tests(ProductTests)
+
+    assert sorted(ran) == [
+        (1, "a"),
+        (1, "b"),
+        (1, "c"),
+        (2, "a"),
+        (2, "b"),
+        (2, "c"),
+    ]
+
+
+def test_product_dict():
+    ran = []
+
+    class ProductTests(ParametrizedTestCase):
+        @parametrize.product({"mode": ["r", "w"], "timeout": [1, 2]}, x=[0])
+        def test_open(self, mode: str, timeout: int, x: int) -> None:
+            ran.append((mode, timeout, x))
+
+    run_tests(ProductTests)
+
+    assert ran == [("r", 1, 0), ("r", 2, 0), ("w", 1, 0), ("w", 2, 0)]
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "ids",
+        "strength",
+        "mode",
+        "workers",
+        "profile",
+        "max_memory",
+        "max_failures",
+        "timeout",
+    ],
+)
+def test_product_option_name(name):
+    with pytest.raises(TypeError) as excinfo:
+        kwargs: dict[str, Any] = {name: [1, 2]}
+        parametrize.product(x=[1], **kwargs)
+
+    assert excinfo.value.args[0] == (
+        f"{name} is an option of product(), to parametrize an argument named"
+        + f" {name}, pass a dict of arguments, like product({{{name!r}: [...]}})"
+    )
+
+
+def test_product_duplicate_argument():
+    with pytest.raises(TypeError) as excinfo:
+        parametrize.product({"x": [1]}, x=[2])
+
+    assert excinfo.value.args[0] == "product() got multiple values for 'x'"
+
+
+def test_product_ids():
+    class ProductTests(ParametrizedTestCase):
+        @parametrize.product(
+            x=[1, 2],
+            y=["a", "b"],
+            z=[True],
+            ids=lambda v: f"z{v}" if isinstance(v, bool) else None,
+        )
+        def test_it(self, x: int, y: str, z: bool) -> None:  # pragma: no cover
+            pass
+
+    assert loaded_test_names(ProductTests) == {
+        "test_it_1_a_zTrue",
+        "test_it_1_b_zTrue",
+        "test_it_2_a_zTrue",
+        "test_it_2_b_zTrue",
+    }
+
+
+def test_product_invalid_ids():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.product(x=["a b"], ids=str)
+
+    assert excinfo.value.args[0] == (
+        "callable ids returned invalid Python identifier suffix: 'a b'"
+    )
+
+
+def test_product_subtest():
+    ran = []
+
+    class ProductTests(ParametrizedTestCase):
+        @parametrize.product(x=[1, 2], y=[3, 4], mode="subtest")
+        def test_it(self, x: int, y: int) -> None:
+            ran.append((x, y))
+
+    run_tests(ProductTests)
+
+    assert ran == [(1, 3), (1, 4), (2, 3), (2, 4)]
+
+
+def test_product_empty_axis():
+    class ProductTests(ParametrizedTestCase):
+        @parametrize.product(x=[1, 2], y=[])
+        def test_it(self, x: int, y: int) -> None:  # pragma: no cover
+            pass
+
+    assert loaded_test_names(ProductTests) == set()
+
+
+def test_product_params_sequence():
+    params = parametrize.product(x=[1, 2], y="ab", ids=str)._parametrized.params
+
+    assert len(params) == 4
+    assert params[-1].id == "2_b"
+    assert params[-1].args == (2, "b")
+    assert params[1].args == (1, "b")
+    assert [p.id for p in params[1:3]] == ["1_b", "2_a"]
+    with pytest.raises(IndexError):
+        params[4]
+
+
+def test_product_no_axes():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.product()
+
+    assert excinfo.value.args[0] == "product() requires at least one argument"
+
+
+def test_product_invalid_mode():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.product(x=[1], mode="other")  # type: ignore[arg-type]
+
+    assert excinfo.value.args[0] == (
+        "mode must be 'methods', 'subtest', or 'benchmark', not 'other'"
+    )
+
+
+def test_product_stacked():
+    with pytest.raises(TypeError) as excinfo:
+
+        class ProductTests(ParametrizedTestCase):
+            @parametrize.product(x=[1])
+            @parametrize.product(y=[2])
+            def test_it(self, x: int, y: int) -> None:  # pragma: no cover
+                pass
+
+    assert excinfo.value.args[0] == (
+        "@parametrize cannot be stacked on test_product_stacked.<locals>.ProductTests.test_it"
+    )
+
+
+def test_product_pairwise():
+    ran = []
+
+    class PairwiseTests(ParametrizedTestCase):
+        @parametrize.product(
+            a=[1, 2, 3], b=[1, 2, 3], c=[1, 2, 3], d=[1, 2, 3], strength=2
+        )
+        def test_it(self, a: int, b: int, c: int, d: int) -> None:
+            ran.append((a, b, c, d))
+
+    names = loaded_test_names(PairwiseTests)
+    assert len(names) < 3**4
+    assert "test_it_a0_b0_c0_d0" in names
+
+    run_tests(PairwiseTests)
+
+    assert len(ran) == len(names)
+    for first, second in itertools.combinations(range(4), 2):
+        pairs = {(values[first], values[second]) for values in ran}
+        assert len(pairs) == 9
+
+
+def test_product_pairwise_ids():
+    class PairwiseTests(ParametrizedTestCase):
+        @parametrize.product(
+            size=[0, 1],
+            encoding=["utf_8", "utf_16"],
+            strict=[True, False],
+            ids=lambda v: f"s{v}" if isinstance(v, int) else None,
+            strength=2,
+        )
+        def test_it(self, size: int, encoding: str, strict: bool) -> None:
+            pass  # pragma: no cover
+
+    names = loaded_test_names(PairwiseTests)
+    assert len(names) < 8
+    for name in names:
+        assert re.fullmatch(r"test_it_s[01]_utf_(8|16)_s(True|False)", name)
+
+
+def test_product_strength_covers_all_axes():
+    params = parametrize.product(x=[1, 2], y=[3, 4], strength=2)._parametrized.params
+
+    assert [p.args for p in params] == [(1, 3), (1, 4), (2, 3), (2, 4)]
+    assert [p.id for p in params] == ["x0_y0", "x0_y1", "x1_y0", "x1_y1"]
+    assert params[-1].id == "x1_y1"
+    with pytest.raises(IndexError):
+        params[4]
+
+
+def test_product_strength_empty_axis():
+    params = parametrize.product(x=[1, 2], y=[], z=[1], strength=1)._parametrized.params
+
+    assert len(params) == 0
+
+
+@pytest.mark.parametrize(
+    "sizes,strength",
+    [
+        ([2, 3, 5], 1),
+        ([2] * 10, 2),
+        ([5, 4, 3, 2, 2, 2], 2),
+        ([4, 1, 3], 2),
+        ([3] * 6, 3),
+    ],
+)
+def test_covering_array(sizes, strength):
+    rows = _combinations.covering_array(sizes, strength)
+
+    assert len(rows) <= math.prod(sizes)
+    for axes in itertools.combinations(range(len(sizes)), strength):
+        covered = {tuple(row[axis] for axis in axes) for row in rows}
+        assert len(covered) == math.prod(sizes[axis] for axis in axes)
+
+
+def test_product_invalid_strength():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize.product(x=[1], strength=0)
+
+    assert excinfo.value.args[0] == "strength must be at least 1, not 0"
+
+
+def test_sample_size():
+    names = loaded_test_names(
+        make_test_case(parametrize_sample_size=3, parametrize_sample_seed=1)
+    )
+
+    assert {"test_plain", "test_cube_one", "test_cube_two"} < names
+    assert len(names) == 6
+    assert names == loaded_test_names(
+        make_test_case(parametrize_sample_size=3, parametrize_sample_seed=1)
+    )
+
+
+def test_sample_seed():
+    samples = {
+        frozenset(
+            loaded_test_names(
+                make_test_case(parametrize_sample_size=3, parametrize_sample_seed=seed)
+            )
+        )
+        for seed in range(5)
+    }
+
+    assert len(samples) > 1
+
+
+def test_sample_fraction():
+    names = loaded_test_names(
+        make_test_case(parametrize_sample_fraction=0.25, parametrize_sample_seed=1)
+    )
+
+    # Rounded up, so each method runs at least one test.
+    assert len([n for n in names if n.startswith("test_square_")]) == 5
+    assert len([n for n in names if n.startswith("test_cube_")]) == 1
+
+
+def test_sample_size_and_fraction():
+    names = loaded_test_names(
+        make_test_case(
+            parametrize_sample_size=3,
+            parametrize_sample_fraction=0.5,
+            parametrize_sample_seed=1,
+        )
+    )
+
+    assert len([n for n in names if n.startswith("test_square_")]) == 3
+    assert len([n for n in names if n.startswith("test_cube_")]) == 1
+
+
+def test_sample_env():
+    with mock.patch.dict(
+        os.environ,
+        {
+            "UNITTEST_PARAMETRIZE_SAMPLE_SIZE": "3",
+            "UNITTEST_PARAMETRIZE_SAMPLE_FRACTION": "0.5",
+            "UNITTEST_PARAMETRIZE_SAMPLE_SEED": "1",
+        },
+    ):
+        names = loaded_test_names(make_test_case())
+
+    assert names == loaded_test_names(
+        make_test_case(
+            parametrize_sample_size=3,
+            parametrize_sample_fraction=0.5,
+            parametrize_sample_seed=1,
+        )
+    )
+
+
+def test_sample_default_seed():
+    names = loaded_test_names(make_test_case(parametrize_sample_size=3))
+
+    assert names == loaded_test_names(make_test_case(parametrize_sample_size=3))
+
+
+def test_sample_after_select():
+    class SampleTests(ParametrizedTestCase):
+        parametrize_select = "test_square_1*"
+        parametrize_sample_size = 2
+        parametrize_sample_seed = 1
+
+        @parametrize("x", list(range(20)))
+        def test_square(self, x: int) -> None:  # pragma: no cover
+            pass
+
+    names = loaded_test_names(SampleTests)
+
+    assert len(names) == 2
+    assert all(n.startswith("test_square_1") for n in names)
+
+
+def test_sample_before_shard():
+    sample = loaded_test_names(
+        make_test_case(parametrize_sample_size=5, parametrize_sample_seed=1)
+    )
+
+    shards = set()
+    for index in range(3):
+        with mock.patch.dict(
+            os.environ,
+            {
+                "UNITTEST_PARAMETRIZE_SHARD_INDEX": str(index),
+                "UNITTEST_PARAMETRIZE_SHARD_COUNT": "3",
+            },
+        ):
+            shards |= loaded_test_names(
+                make_test_case(parametrize_sample_size=5, parametrize_sample_seed=1)
+            )
+
+    assert shards == sample
+
+
+def test_sample_failure_note():
+    class SampleTests(ParametrizedTestCase):
+        parametrize_sample_size = 1
+        parametrize_sample_seed = 1234
+
+        @parametrize("x", [1, 2, 3], mode="subtest")
+        def test_square(self, x: int) -> None:
+            self.assertEqual(x, 0)
+
+    result = run_tests(SampleTests)
+
+    assert len(result.failures) == 1
+    if sys.version_info >= (3, 11):
+        *_, message = result.failures[0]
+        assert message.endswith(
+            "\nParameters sampled with seed 1234,"
+            + " set UNITTEST_PARAMETRIZE_SAMPLE_SEED=1234 to reproduce\n"
+        )
+
+
+@pytest.mark.parametrize(
+    "size,fraction,message",
+    [
+        (0, None, "Sample size must be at least 1, not 0"),
+        (
+            None,
+            0.0,
+            "Sample fraction must be greater than 0 and at most 1, not 0.0",
+        ),
+        (
+            None,
+            1.5,
+            "Sample fraction must be greater than 0 and at most 1, not 1.5",
+        ),
+    ],
+)
+def test_sample_invalid(size, fraction, message):
+    with pytest.raises(ValueError) as excinfo:
+        make_test_case(
+            parametrize_sample_size=size, parametrize_sample_fraction=fraction
+        )
+
+    assert excinfo.value.args[0] == message
+
+
+def test_sample_invalid_env_fraction():
+    with (
+        mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_SAMPLE_FRACTION": "half"}),
+        pytest.raises(ValueError) as excinfo,
+    ):
+        make_test_case()
+
+    assert excinfo.value.args[0] == (
+        "UNITTEST_PARAMETRIZE_SAMPLE_FRACTION must be a number, not 'half'"
+    )
+
+
+def test_class():
+    set_up = []
+    ran = []
+
+    @parametrize("x,expected", [(1, 1), (2, 4)], ids=["one", "two"])
+    class SquareClassTests(ParametrizedTestCase):
+        x: int
+        expected: int
+
+        @classmethod
+        def setUpClass(cls) -> None:
+            super().setUpClass()
+            set_up.append(cls.x)
+
+        def test_square(self) -> None:
+            ran.append(("square", self.x))
+            self.assertEqual(self.x**2, self.expected)
+
+        def test_positive(self) -> None:
+            ran.append(("positive", self.x))
+            self.assertGreater(self.x, 0)
+
+    module = sys.modules[__name__]
+    one = module.SquareClassTests_one
+    two = module.SquareClassTests_two
+    assert issubclass(one, SquareClassTests)
+    assert one.__qualname__ == "SquareClassTests_one"
+    assert (one.x, one.expected) == (1, 1)
+    assert (two.x, two.expected) == (2, 4)
+    assert loaded_test_names(SquareClassTests) == set()
+    assert loaded_test_names(one) == {"test_positive", "test_square"}
+
+    assert run_tests(SquareClassTests).testsRun == 0
+    result = run_tests(one)
+    result2 = run_tests(two)
+
+    assert result.wasSuccessful()
+    assert result2.wasSuccessful()
+    assert set_up == [1, 2]
+    assert ran == [
+        ("positive", 1),
+        ("square", 1),
+        ("positive", 2),
+        ("square", 2),
+    ]
+
+
+def test_class_inherited_tests():
+    class Mixin(unittest.TestCase):
+        x: int
+
+        def test_inherited(self) -> None:
+            self.assertIn(self.x, (1, 2))
+
+    @parametrize("x", [1, 2])
+    class InheritedClassTests(ParametrizedTestCase, Mixin):
+        pass
+
+    module = sys.modules[__name__]
+    subclass = module.InheritedClassTests_1
+
+    assert loaded_test_names(InheritedClassTests) == set()
+    assert loaded_test_names(subclass) == {"test_inherited"}
+    assert run_tests(subclass).wasSuccessful()
+
+
+def test_class_with_parametrized_methods():
+    ran = []
+
+    @parametrize("base", [2, 3])
+    class PowerClassTests(ParametrizedTestCase):
+        base: int
+
+        @parametrize("exponent", [0, 1])
+        def test_power(self, exponent: int) -> None:
+            ran.append((self.base, exponent))
+
+    module = sys.modules[__name__]
+    for name in ("PowerClassTests_0", "PowerClassTests_1"):
+        subclass = getattr(module, name)
+        assert loaded_test_names(subclass) == {"test_power_0", "test_power_1"}
+        run_tests(subclass)
+
+    assert ran == [(2, 0), (2, 1), (3, 0), (3, 1)]
+
+
+def test_class_not_parametrized_test_case():
+    with pytest.raises(TypeError) as excinfo:
+
+        @parametrize("x", [1])
+        class PlainTests(unittest.TestCase):
+            pass
+
+    assert excinfo.value.args[0] == (
+        "@parametrize can only decorate ParametrizedTestCase subclasses,"
+        + " not test_class_not_parametrized_test_case.<locals>.PlainTests"
+    )
+
+
+def test_class_subtest_mode():
+    with pytest.raises(ValueError) as excinfo:
+
+        @parametrize("x", [1], mode="subtest")
+        class SubtestClassTests(ParametrizedTestCase):
+            pass
+
+    assert excinfo.value.args[0] == (
+        "@parametrize on test_class_subtest_mode.<locals>.SubtestClassTests"
+        + " requires mode='methods'"
+    )
+
+
+def test_class_stacked():
+    with pytest.raises(TypeError) as excinfo:
+
+        @parametrize("x", [1])
+        @parametrize("y", [1])
+        class StackedClassTests(ParametrizedTestCase):
+            pass
+
+    assert excinfo.value.args[0] == (
+        "@parametrize cannot be stacked on"
+        + " test_class_stacked.<locals>.StackedClassTests"
+    )
+
+
+def test_class_subclassed():
+    @parametrize("x", [1])
+    class BaseClassTests(ParametrizedTestCase):
+        x: int
+
+    with pytest.raises(TypeError) as excinfo:
+
+        class ChildClassTests(BaseClassTests):
+            pass
+
+    assert excinfo.value.args[0] == (
+        "Cannot subclass test_class_subclassed.<locals>.BaseClassTests,"
+        + " which is decorated with @parametrize"
+    )
+
+
+def test_class_generated_subclassed():
+    @parametrize("x", [1])
+    class GeneratedClassTests(ParametrizedTestCase):
+        x: int
+
+    generated = sys.modules[__name__].GeneratedClassTests_0
+
+    with pytest.raises(TypeError) as excinfo:
+        type("ChildClassTests", (generated,), {})
+
+    assert excinfo.value.args[0] == (
+        "Cannot subclass test_class_generated_subclassed.<locals>"
+        + ".GeneratedClassTests, which is decorated with @parametrize"
+    )
+
+
+def test_class_same_statement_twice():
+    def make_class() -> type[ParametrizedTestCase]:
+        @parametrize("x", [1])
+        class RepeatedClassTests(ParametrizedTestCase):
+            x: int
+
+        return RepeatedClassTests
+
+    make_class()
+    cls = make_class()
+
+    assert sys.modules[__name__].RepeatedClassTests_0.__bases__ == (cls,)
+
+
+def test_class_name_clash():
+    def make_class() -> None:
+        @parametrize("x", [1])
+        class ClashingClassTests(ParametrizedTestCase):
+            x: int
+
+    def make_other_class() -> None:
+        @parametrize("x", [1])
+        class ClashingClassTests(ParametrizedTestCase):
+            x: int
+
+    make_class()
+
+    with pytest.raises(ValueError) as excinfo:
+        make_other_class()
+
+    assert excinfo.value.args[0] == (
+        "@parametrize on test_class_name_clash.<locals>.make_other_class"
+        + ".<locals>.ClashingClassTests cannot add ClashingClassTests_0 to module"
+        + " tests.test_unittest_parametrize, which already has an attribute"
+        + " with that name"
+    )
+
+
+@pytest.mark.parametrize("argname", ["id", "run", "_outcome", "parametrize_select"])
+def test_class_reserved_argname(argname):
+    with pytest.raises(ValueError) as excinfo:
+
+        @parametrize(argname, [1])
+        class ReservedClassTests(ParametrizedTestCase):
+            pass
+
+    assert excinfo.value.args[0] == (
+        "@parametrize on test_class_reserved_argname.<locals>.ReservedClassTests"
+        + f" cannot use the argument name {argname!r}, which is a TestCase"
+        + " attribute"
+    )
+    assert not hasattr(sys.modules[__name__], "ReservedClassTests_0")
+
+
+def test_report_json(tmp_path):
+    report_file = tmp_path / "report.json"
+
+    class ReportTests(ParametrizedTestCase):
+        parametrize_report_file = str(report_file)
+
+        @parametrize("x", [1, 2], ids=["one", "two"])
+        def test_square(self, x: int) -> None:
+            pass
+
+        @parametrize("x", [3], mode="subtest")
+        def test_cube(self, x: int) -> None:
+            time.sleep(0.01)
+
+    run_tests(ReportTests)
+    _timings.report()
+
+    report = json.loads(report_file.read_text())
+    class_name = full_class_name(ReportTests)
+    assert sorted((r["class"], r["method"], r["id"]) for r in report) == [
+        (class_name, "test_cube", "0"),
+        (class_name, "test_square", "one"),
+        (class_name, "test_square", "two"),
+    ]
+    (cube,) = (r for r in report if r["method"] == "test_cube")
+    assert cube["wall_seconds"] >= 0.01
+    assert 0 <= cube["cpu_seconds"] < cube["wall_seconds"]
+
+
+def test_report_csv(tmp_path):
+    report_file = tmp_path / "report.csv"
+
+    with mock.patch.dict(
+        os.environ, {"UNITTEST_PARAMETRIZE_REPORT_FILE": str(report_file)}
+    ):
+
+        class ReportTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+            @parametrize("x", [1, 2])
+            async def test_square(self, x: int) -> None:
+                pass
+
+    run_tests(ReportTests)
+    _timings.report()
+
+    lines = report_file.read_text().splitlines()
+    assert lines[0] == "class,method,id,wall_seconds,cpu_seconds,peak_bytes"
+    assert [line.split(",")[1:3] for line in lines[1:]] == [
+        ["test_square", "0"],
+        ["test_square", "1"],
+    ]
+
+
+def test_report_invalid_extension(tmp_path):
+    with pytest.raises(ValueError) as excinfo:
+        make_test_case(parametrize_report_file=str(tmp_path / "report.txt"))
+
+    assert excinfo.value.args[0] == (
+        f"Report file {str(tmp_path / 'report.txt')!r}"
+        + " must have a .json or .csv extension"
+    )
+
+
+def test_slowest(capsys):
+    class SlowTests(ParametrizedTestCase):
+        parametrize_slowest = 2
+
+        @parametrize("delay", [0.0, 0.03, 0.02], ids=["none", "long", "short"])
+        def test_sleep(self, delay: float) -> None:
+            time.sleep(delay)
+
+    run_tests(SlowTests)
+    capsys.readouterr()
+    _timings.report()
+
+    lines = capsys.readouterr().err.splitlines()
+    class_name = full_class_name(SlowTests)
+    assert lines[:2] == ["", "Slowest 2 parametrized tests:"]
+    assert lines[2].endswith(f"  {class_name}.test_sleep_long")
+    assert lines[3].endswith(f"  {class_name}.test_sleep_short")
+    assert len(lines) == 4
+
+
+def test_slowest_env(capsys):
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_SLOWEST": "5"}):
+
+        class SlowTests(ParametrizedTestCase):
+            @parametrize("x", [1, 2, 3])
+            def test_it(self, x: int) -> None:
+                pass
+
+    run_tests(SlowTests)
+    capsys.readouterr()
+    _timings.report()
+
+    lines = capsys.readouterr().err.splitlines()
+    assert lines[1] == "Slowest 3 parametrized tests:"
+    assert len(lines) == 5
+
+
+def _profiled_calls(path: os.PathLike[str], func_name: str) -> int:
+    stats = pstats.Stats(os.fspath(path))
+    return sum(
+        stat[1]
+        for (_, _, name), stat in stats.stats.items()  # type: ignore[attr-defined]
+        if name == func_name
+    )
+
+
+def test_profile(tmp_path):
+    class ProfileTests(ParametrizedTestCase):
+        parametrize_profile_dir = str(tmp_path)
+
+        @parametrize("x", [1, 2], profile=True)
+        def test_square(self, x: int) -> None:
+            self.assertEqual(x**2, x * x)
+
+    run_tests(ProfileTests)
+
+    class_name = full_class_name(ProfileTests)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"{class_name}.test_square_0.pstats",
+        f"{class_name}.test_square_1.pstats",
+    ]
+    path = tmp_path / f"{class_name}.test_square_0.pstats"
+    assert _profiled_calls(path, "test_square") == 1
+
+
+def test_profile_aggregate(tmp_path):
+    class ProfileTests(ParametrizedTestCase):
+        parametrize_profile_dir = str(tmp_path / "prof")
+
+        @parametrize("x", [1, 2, 3], mode="subtest", profile="aggregate")
+        def test_square(self, x: int) -> None:
+            self.assertEqual(x**2, x * x)
+
+    run_tests(ProfileTests)
+    _profiles.save()
+
+    path = tmp_path / "prof" / f"{full_class_name(ProfileTests)}.test_square.pstats"
+    assert _profiled_calls(path, "test_square") == 3
+
+
+def test_profile_env(tmp_path):
+    with mock.patch.dict(
+        os.environ,
+        {
+            "UNITTEST_PARAMETRIZE_PROFILE": "aggregate",
+            "UNITTEST_PARAMETRIZE_PROFILE_DIR": str(tmp_path),
+        },
+    ):
+
+        class ProfileTests(ParametrizedTestCase):
+            @parametrize("x", [1, 2])
+            def test_square(self, x: int) -> None:
+                pass
+
+            @parametrize("x", [1, 2], mode="subtest", workers=2)
+            def test_cube(self, x: int) -> None:
+                pass
+
+    run_tests(ProfileTests)
+    _profiles.save()
+
+    # Not test_cube, since profiling cannot run with workers.
+    (path,) = tmp_path.iterdir()
+    assert path.name == f"{full_class_name(ProfileTests)}.test_square.pstats"
+    assert _profiled_calls(path, "test_square") == 2
+
+
+def test_profile_env_per_case(tmp_path):
+    with mock.patch.dict(
+        os.environ,
+        {
+            "UNITTEST_PARAMETRIZE_PROFILE": "1",
+            "UNITTEST_PARAMETRIZE_PROFILE_DIR": str(tmp_path),
+        },
+    ):
+
+        class ProfileTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+            @parametrize("x", [1])
+            async def test_square(self, x: int) -> None:
+                pass
+
+    run_tests(ProfileTests)
+
+    (path,) = tmp_path.iterdir()
+    assert path.name == f"{full_class_name(ProfileTests)}.test_square_0.pstats"
+
+
+def test_profile_env_invalid():
+    with (
+        mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_PROFILE": "yes"}),
+        pytest.raises(ValueError) as excinfo,
+    ):
+        make_test_case()
+
+    assert excinfo.value.args[0] == (
+        "UNITTEST_PARAMETRIZE_PROFILE must be '1' or 'aggregate', not 'yes'"
+    )
+
+
+def test_profile_invalid():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], profile="all")  # type: ignore[arg-type]
+
+    assert excinfo.value.args[0] == (
+        "profile must be True, False, or 'aggregate', not 'all'"
+    )
+
+
+def test_profile_workers():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], mode="subtest", workers=2, profile=True)
+
+    assert excinfo.value.args[0] == "profile cannot be used with workers"
+
+
+def test_max_memory():
+    class MemoryTests(ParametrizedTestCase):
+        @parametrize(
+            "size",
+            [
+                param(1_000, id="small", max_memory="1MB"),
+                param(2_000_000, id="large", max_memory="1MB"),
+                param(2_000_000, id="unlimited"),
+            ],
+        )
+        def test_allocate(self, size: int) -> None:
+            data = bytearray(size)
+            del data
+
+    result = run_tests(MemoryTests)
+
+    assert result.testsRun == 3
+    assert len(result.failures) == 1
+    test, message = result.failures[0]
+    assert test.id().endswith(".test_allocate_large")
+    assert "AssertionError: Peak memory of 2,0" in message
+    assert "bytes exceeded max_memory of 1,000,000 bytes" in message
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: size=2000000\n")
+
+
+def test_max_memory_method():
+    class MemoryTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize(
+            "size",
+            [1_000, 2_000_000, param(2_000_000, id="override", max_memory="4MiB")],
+            mode="subtest",
+            max_memory=1_000_000,
+        )
+        async def test_allocate(self, size: int) -> None:
+            data = bytearray(size)
+            del data
+
+    result = run_tests(MemoryTests)
+
+    assert len(result.failures) == 1
+    test, message = result.failures[0]
+    assert "(size=2000000)" in str(test)
+    assert "exceeded max_memory of 1,000,000 bytes" in message
+
+
+def test_max_memory_already_tracing():
+    class MemoryTests(ParametrizedTestCase):
+        @parametrize("size", [1_000], max_memory="1MB")
+        def test_allocate(self, size: int) -> None:
+            bytearray(size)
+
+    tracemalloc.start()
+    try:
+        assert run_tests(MemoryTests).wasSuccessful()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_trace_memory_report(tmp_path):
+    report_file = tmp_path / "report.json"
+
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_TRACE_MEMORY": "1"}):
+
+        class MemoryTests(ParametrizedTestCase):
+            parametrize_report_file = str(report_file)
+
+            @parametrize("size", [1_000_000])
+            def test_allocate(self, size: int) -> None:
+                bytearray(size)
+
+            @parametrize("size", [1_000_000], mode="subtest", workers=2)
+            def test_threads(self, size: int) -> None:
+                bytearray(size)
+
+    run_tests(MemoryTests)
+    _timings.report()
+
+    report = {r["method"]: r for r in json.loads(report_file.read_text())}
+    assert 1_000_000 <= report["test_allocate"]["peak_bytes"] < 2_000_000
+    # Not traced with workers.
+    assert report["test_threads"]["peak_bytes"] is None
+
+
+def test_trace_memory_class_attribute(tmp_path):
+    report_file = tmp_path / "report.csv"
+
+    class MemoryTests(ParametrizedTestCase):
+        parametrize_report_file = str(report_file)
+        parametrize_trace_memory = True
+
+        @parametrize("size", [1_000_000])
+        def test_allocate(self, size: int) -> None:
+            bytearray(size)
+
+    run_tests(MemoryTests)
+    _timings.report()
+
+    _, row = report_file.read_text().splitlines()
+    assert int(row.split(",")[-1]) >= 1_000_000
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (1_000, 1_000),
+        ("10", 10),
+        ("200MB", 200_000_000),
+        ("512 KiB", 524_288),
+        ("1.5GiB", 1_610_612_736),
+        ("2gb", 2_000_000_000),
+    ],
+)
+def test_max_memory_sizes(value, expected):
+    assert param(1, max_memory=value).max_memory == expected
+
+
+def test_max_memory_invalid():
+    with pytest.raises(ValueError) as excinfo:
+        param(1, max_memory="lots")
+
+    assert excinfo.value.args[0] == "Invalid memory size: 'lots'"
+
+
+def test_max_memory_workers():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], mode="subtest", workers=2, max_memory="1MB")
+
+    assert excinfo.value.args[0] == "max_memory cannot be used with workers"
+
+
+def test_max_memory_param_workers():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [param(1, max_memory="1MB")], mode="subtest", workers=2)
+
+    assert excinfo.value.args[0] == "max_memory cannot be used with workers"
+
+
+def test_max_memory_cached(cache_dir):
+    def make_cases() -> list[param]:
+        return [param(1, max_memory="1MB")]
+
+    parametrize.cached("x", make_cases)
+    params = parametrize.cached("x", make_cases)._parametrized.params
+
+    assert params[0].max_memory == 1_000_000
+
+
+def test_max_memory_lazy():
+    assert param.lazy(list, max_memory="1KB").max_memory == 1_000
+
+
+def test_max_failures():
+    set_ups = []
+
+    class MaxFailuresTests(ParametrizedTestCase):
+        def setUp(self) -> None:
+            set_ups.append(self._testMethodName)
+
+        @parametrize("x", [1, 2, 3, 4], max_failures=2)
+        def test_fail(self, x: int) -> None:
+            self.fail(str(x))
+
+    result = run_tests(MaxFailuresTests)
+
+    assert len(result.failures) == 2
+    assert set_ups == ["test_fail_0", "test_fail_1"]
+    assert [reason for _, reason in result.skipped] == [
+        "Skipped after 2 failures of test_fail: test_fail_0, test_fail_1",
+    ] * 2
+
+
+def test_max_failures_per_class_and_run():
+    class MaxFailuresTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2, 3], max_failures=1)
+        def test_fail(self, x: int) -> None:
+            self.fail(str(x))
+
+    class SubclassTests(MaxFailuresTests):
+        pass
+
+    for test_case in [MaxFailuresTests, SubclassTests, MaxFailuresTests]:
+        result = run_tests(test_case)
+
+        assert len(result.failures) == 1
+        assert [reason for _, reason in result.skipped] == [
+            "Skipped after 1 failures of test_fail: test_fail_0",
+        ] * 2
+
+
+def test_max_failures_without_result():
+    class MaxFailuresTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2], max_failures=1)
+        def test_fail(self, x: int) -> None:
+            self.fail(str(x))
+
+    for name in ["test_fail_0", "test_fail_1"]:
+        with pytest.raises(AssertionError):
+            MaxFailuresTests(name).debug()
+
+
+def test_max_failures_passing():
+    class MaxFailuresTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2, 4, 3], max_failures=2)
+        def test_even(self, x: int) -> None:
+            self.assertEqual(x % 2, 0)
+
+    result = run_tests(MaxFailuresTests)
+
+    assert len(result.failures) == 2
+    assert result.skipped == []
+
+
+def test_max_failures_subtest():
+    class MaxFailuresTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2, 3], mode="subtest", max_failures=1)
+        def test_fail(self, x: int) -> None:
+            self.fail(str(x))
+
+    result = run_tests(MaxFailuresTests)
+
+    assert len(result.failures) == 1
+    assert [reason for _, reason in result.skipped] == [
+        "Skipped after 1 failures of test_fail: test_fail_0",
+    ] * 2
+
+
+def test_max_failures_constructors(tmp_path, cache_dir):
+    data_file = tmp_path / "data.csv"
+    data_file.write_text("x\n1\n")
+
+    def make_cases() -> list[int]:
+        return [1]
+
+    for decorator in [
+        parametrize.from_file(data_file, "x", max_failures=3),
+        parametrize.product(x=[1], max_failures=3),
+        parametrize.cached("x", make_cases, max_failures=3),
+        parametrize.cached("x", make_cases, max_failures=3),
+    ]:
+        assert decorator._parametrized.max_failures == 3
+
+
+def test_max_failures_invalid():
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], max_failures=0)
+
+    assert excinfo.value.args[0] == "max_failures must be at least 1, not 0"
+
+
+def test_benchmark(tmp_path):
+    results_file = tmp_path / "benchmarks.json"
+    calls = []
+
+    class BenchmarkTests(ParametrizedTestCase):
+        parametrize_benchmark_file = str(results_file)
+
+        @parametrize("delay", [0.0, 0.002], ids=["none", "short"], mode="benchmark")
+        def test_sleep(self, delay: float) -> None:
+            calls.append(delay)
+            time.sleep(delay)
+
+    assert loaded_test_names(BenchmarkTests) == {
+        "test_sleep_none",
+        "test_sleep_short",
+    }
+
+    assert run_tests(BenchmarkTests).wasSuccessful()
+    _benchmarks.save()
+
+    results = json.loads(results_file.read_text())
+    tests = results[full_class_name(BenchmarkTests)]
+    assert set(tests) == {"test_sleep_none", "test_sleep_short"}
+    short = tests["test_sleep_short"]
+    assert short["rounds"] == 5
+    assert calls.count(0.002) > short["iterations"] * 5
+    assert 0.002 <= short["min"] <= short["median"]
+    assert short["stddev"] >= 0
+    assert tests["test_sleep_none"]["iterations"] > short["iterations"]
+
+
+def test_benchmark_async(tmp_path):
+    results_file = tmp_path / "benchmarks.json"
+
+    with mock.patch.dict(
+        os.environ, {"UNITTEST_PARAMETRIZE_BENCHMARK_FILE": str(results_file)}
+    ):
+
+        class BenchmarkTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+            @parametrize("delay", [0.001], mode="benchmark")
+            async def test_sleep(self, delay: float) -> None:
+                await asyncio.sleep(delay)
+
+    assert run_tests(BenchmarkTests).wasSuccessful()
+    _benchmarks.save()
+
+    results = json.loads(results_file.read_text())
+    result = results[full_class_name(BenchmarkTests)]["test_sleep_0"]
+    assert result["min"] >= 0.001
+
+
+def write_baseline(
+    path: os.PathLike[str],
+    test_case: type[ParametrizedTestCase],
+    minimums: dict[str, float],
+) -> None:
+    with open(path, "w") as fp:
+        json.dump(
+            {
+                full_class_name(test_case): {
+                    name: {"min": value} for name, value in minimums.items()
+                }
+            },
+            fp,
+        )
+
+
+def test_benchmark_baseline_regression(tmp_path):
+    baseline_file = tmp_path / "baseline.json"
+
+    class BenchmarkTests(ParametrizedTestCase):
+        parametrize_benchmark_baseline = str(baseline_file)
+
+        @parametrize("delay", [0.001, 0.0], mode="benchmark")
+        def test_sleep(self, delay: float) -> None:
+            time.sleep(delay)
+
+    write_baseline(
+        baseline_file, BenchmarkTests, {"test_sleep_0": 0.0001, "test_sleep_1": 0.0}
+    )
+
+    result = run_tests(BenchmarkTests)
+
+    assert len(result.failures) == 1
+    test, message = result.failures[0]
+    assert test.id().endswith(".test_sleep_0")
+    assert "AssertionError: Benchmark regressed: minimum time of 0.00" in message
+    assert "the baseline of 0.0001s, above the threshold of 1.25x\n" in message
+
+
+def test_benchmark_baseline_within_threshold(tmp_path):
+    baseline_file = tmp_path / "baseline.json"
+
+    class BenchmarkTests(ParametrizedTestCase):
+        @parametrize("delay", [0.001], mode="benchmark")
+        def test_sleep(self, delay: float) -> None:
+            time.sleep(delay)
+
+    write_baseline(baseline_file, BenchmarkTests, {"test_sleep_0": 0.0001})
+
+    with mock.patch.dict(
+        os.environ,
+        {
+            "UNITTEST_PARAMETRIZE_BENCHMARK_BASELINE": str(baseline_file),
+            "UNITTEST_PARAMETRIZE_BENCHMARK_THRESHOLD": "1000",
+        },
+    ):
+        result = run_tests(BenchmarkTests)
+
+    assert result.wasSuccessful()
+
+
+def test_benchmark_baseline_missing(tmp_path):
+    class BenchmarkTests(ParametrizedTestCase):
+        parametrize_benchmark_baseline = str(tmp_path / "missing.json")
+        parametrize_benchmark_threshold = 1.0
+
+        @parametrize("delay", [0.0], mode="benchmark")
+        def test_sleep(self, delay: float) -> None:
+            time.sleep(delay)
+
+    result = run_tests(BenchmarkTests)
+
+    assert result.wasSuccessful()
+
+
+def test_benchmark_invalid_threshold():
+    with (
+        mock.patch.dict(
+            os.environ, {"UNITTEST_PARAMETRIZE_BENCHMARK_THRESHOLD": "high"}
+        ),
+        pytest.raises(ValueError) as excinfo,
+    ):
+        make_test_case()
+
+    assert excinfo.value.args[0] == (
+        "UNITTEST_PARAMETRIZE_BENCHMARK_THRESHOLD must be a number, not 'high'"
+    )
+
+
+def test_last_failed_record(cache_dir):
+    other = {"example.Tests": ["test_other_0"]}
+    cache_dir.mkdir()
+    (cache_dir / "lastfailed.json").write_text(json.dumps(other))
+
+    class LastFailedTests(ParametrizedTestCase):
+        parametrize_last_failed = "record"
+
+        @parametrize("x", [1, 2, 3, 4])
+        def test_even(self, x: int) -> None:
+            if x == 3:
+                self.skipTest("three")
+            self.assertEqual(x % 2, 0)
+
+    run_tests(LastFailedTests)
+    _last_failed.save()
+
+    assert json.loads((cache_dir / "lastfailed.json").read_text()) == {
+        **other,
+        full_class_name(LastFailedTests): ["test_even_0"],
+    }
+
+    with mock.patch.object(ParametrizedTestCase, "assertEqual"):
+        run_tests(LastFailedTests)
+    _last_failed.save()
+
+    assert json.loads((cache_dir / "lastfailed.json").read_text()) == other
+
+
+def test_last_failed_only(cache_dir):
+    cache_dir.mkdir()
+    (cache_dir / "lastfailed.json").write_text(
+        json.dumps(
+            {
+                f"{__name__}.test_last_failed_only.<locals>.LastFailedTests": [
+                    "test_even_1",
+                    "test_even_2",
+                ]
+            }
+        )
+    )
+
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_LAST_FAILED": "only"}):
+
+        class LastFailedTests(ParametrizedTestCase):
+            @parametrize("x", [1, 2, 3, 4])
+            def test_even(self, x: int) -> None:  # pragma: no cover
+                pass
+
+    assert loaded_test_names(LastFailedTests) == {"test_even_1", "test_even_2"}
+
+
+def test_last_failed_only_nothing_failed(cache_dir):
+    class LastFailedTests(ParametrizedTestCase):
+        parametrize_last_failed = "only"
+
+        @parametrize("x", [1, 2, 3, 4])
+        def test_even(self, x: int) -> None:  # pragma: no cover
+            pass
+
+    assert len(loaded_test_names(LastFailedTests)) == 4
+    assert not cache_dir.exists()
+
+
+def test_last_failed_first(cache_dir):
+    cache_dir.mkdir()
+    (cache_dir / "lastfailed.json").write_text(
+        json.dumps(
+            {
+                f"{__name__}.test_last_failed_first.<locals>.LastFailedTests": [
+                    "test_even_3",
+                    "test_even_0",
+                ]
+            }
+        )
+    )
+    ran = []
+
+    class LastFailedTests(ParametrizedTestCase):
+        parametrize_last_failed = "first"
+
+        @parametrize("x", [1, 2, 3, 4], mode="subtest")
+        def test_even(self, x: int) -> None:
+            ran.append(x)
+            if x == 3:
+                self.skipTest("three")
+            self.assertEqual(x % 2, 0)
+
+    run_tests(LastFailedTests)
+    _last_failed.save()
+
+    assert ran == [1, 4, 2, 3]
+    assert json.loads((cache_dir / "lastfailed.json").read_text()) == {
+        full_class_name(LastFailedTests): ["test_even_0"],
+    }
+
+
+def test_last_failed_memory(cache_dir):
+    class MemoryTests(ParametrizedTestCase):
+        parametrize_last_failed = "record"
+
+        @parametrize("size", [2_000_000, -1], max_memory="1MB")
+        def test_allocate(self, size: int) -> None:
+            bytearray(size)
+
+    run_tests(MemoryTests)
+    _last_failed.save()
+
+    data = json.loads((cache_dir / "lastfailed.json").read_text())
+    assert data == {
+        full_class_name(MemoryTests): ["test_allocate_0", "test_allocate_1"]
+    }
+
+
+def test_last_failed_invalid():
+    with pytest.raises(ValueError) as excinfo:
+
+        class LastFailedTests(ParametrizedTestCase):
+            parametrize_last_failed = "last"  # type: ignore[assignment]
+
+            @parametrize("x", [1])
+            def test_even(self, x: int) -> None:  # pragma: no cover
+                pass
+
+    assert excinfo.value.args[0] == (
+        "Last failed mode must be 'record', 'first', or 'only', not 'last'"
+    )
+
+
+def run_incremental_tests(test_case: type[ParametrizedTestCase]) -> unittest.TestResult:
+    result = run_tests(test_case)
+    _incremental.save()
+    # Load again, as a later process would.
+    _incremental._store._loaded.clear()
+    return result
+
+
+def test_incremental(cache_dir):
+    ran = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+        failing = {2}
+
+        @parametrize("x", [1, 2, 3])
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+            if x in self.failing:
+                self.fail("failing")
+
+    run_incremental_tests(IncrementalTests)
+    assert ran == [1, 2, 3]
+
+    ran.clear()
+    result = run_incremental_tests(IncrementalTests)
+    assert ran == [2]
+    assert [reason for _, reason in result.skipped] == [
+        "Unchanged since last passing run",
+    ] * 2
+
+    ran.clear()
+    IncrementalTests.failing = {1, 2}
+    run_incremental_tests(IncrementalTests)
+    assert ran == [2]
+
+
+def test_incremental_fail_forgets(cache_dir):
+    ran = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+        failing: set[int] = set()
+
+        @parametrize("x", [1, 2, 3])
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+            if x in self.failing:
+                self.fail("failing")
+
+    run_incremental_tests(IncrementalTests)
+
+    ran.clear()
+    IncrementalTests.failing = {1, 2, 3}
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_FORCE": "1"}):
+        run_incremental_tests(IncrementalTests)
+    assert ran == [1, 2, 3]
+
+    data = json.loads((cache_dir / "incremental.json").read_text())
+    assert data == {}
+    ran.clear()
+    IncrementalTests.failing = set()
+    run_incremental_tests(IncrementalTests)
+    assert ran == [1, 2, 3]
+
+
+def test_incremental_changed_values(cache_dir):
+    ran = []
+    values = [1, 2, 3]
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+
+        @parametrize("x", values)
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+
+    run_incremental_tests(IncrementalTests)
+
+    ran.clear()
+    values = [1, 4, 3]
+
+    class IncrementalTests(ParametrizedTestCase):  # type: ignore[no-redef]
+        parametrize_incremental = True
+
+        @parametrize("x", values)
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+
+    run_incremental_tests(IncrementalTests)
+
+    assert ran == [4]
+
+
+def test_incremental_added_values(cache_dir):
+    ran = []
+    set_ups = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+
+        def setUp(self) -> None:
+            set_ups.append(self._testMethodName)
+
+        @parametrize("x", [1, 2])
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+
+    run_incremental_tests(IncrementalTests)
+
+    ran.clear()
+    set_ups.clear()
+
+    class IncrementalTests(ParametrizedTestCase):  # type: ignore[no-redef]
+        parametrize_incremental = True
+
+        def setUp(self) -> None:
+            set_ups.append(self._testMethodName)
+
+        @parametrize(
+            "x",
+            [1, 2, 3],
+        )
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+
+    result = run_incremental_tests(IncrementalTests)
+
+    assert ran == [3]
+    assert set_ups == ["test_pass_2"]
+    assert len(result.skipped) == 2
+
+
+def test_incremental_subtest(cache_dir):
+    ran = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+
+        @parametrize("x", [1, 2], mode="subtest")
+        def test_pass(self, x: int) -> None:
+            ran.append(x)
+
+    run_incremental_tests(IncrementalTests)
+    result = run_incremental_tests(IncrementalTests)
+
+    assert ran == [1, 2]
+    assert [reason for _, reason in result.skipped] == [
+        "Unchanged since last passing run",
+    ] * 2
+
+
+def test_incremental_sets(cache_dir):
+    ran = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+
+        @parametrize("x", [frozenset({"a", "b", "c", "d"})])
+        def test_pass(self, x: frozenset[str]) -> None:
+            ran.append(x)
+
+    run_incremental_tests(IncrementalTests)
+    result = run_incremental_tests(IncrementalTests)
+
+    assert len(ran) == 1
+    assert len(result.skipped) == 1
+
+
+def test_incremental_fingerprint_sets():
+    script = (
+        "from unittest_parametrize import _cache\n"
+        + "value = {'x': frozenset('abcdefgh'), 'y': [{'p', ('q', frozenset('rs'))}]}\n"
+        + "print(_cache.stable_dumps(value).hex())\n"
+    )
+
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+        ).stdout
+        for seed in range(4)
+    }
+
+    assert len(outputs) == 1
+
+
+def test_incremental_lambda(cache_dir):
+    ran = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+
+        test_one = parametrize("x", [1])(lambda self, x: ran.append(x))
+        test_two = parametrize(
+            "x",
+            [2],
+        )(lambda self, x: ran.append(x))
+
+    run_incremental_tests(IncrementalTests)
+    run_incremental_tests(IncrementalTests)
+
+    assert ran == [1, 2]
+
+
+def test_incremental_unpicklable(cache_dir):
+    ran = []
+
+    class IncrementalTests(ParametrizedTestCase):
+        parametrize_incremental = True
+
+        @parametrize("x", [lambda: None])
+        def test_pass(self, x: Any) -> None:
+            ran.append(x)
+
+    run_incremental_tests(IncrementalTests)
+    run_incremental_tests(IncrementalTests)
+
+    assert len(ran) == 2
+    assert not (cache_dir / "incremental.json").exists()
+
+
+def test_incremental_env(cache_dir):
+    with mock.patch.dict(os.environ, {"UNITTEST_PARAMETRIZE_INCREMENTAL": "1"}):
+
+        class IncrementalTests(ParametrizedTestCase):
+            @parametrize("x", [1])
+            def test_pass(self, x: int) -> None:
+                pass
+
+    run_tests(IncrementalTests)
+    _incremental.save()
+
+    data = json.loads((cache_dir / "incremental.json").read_text())
+    assert list(data[full_class_name(IncrementalTests)]) == ["test_pass_0"]
+
+
+def test_timeout():
+    class SleepTests(ParametrizedTestCase):
+        @parametrize(
+            "delay",
+            [0.0, 10.0, param(0.1, timeout=1.0)],
+            ids=["none", "long", "short"],
+            timeout=0.05,
+        )
+        def test_sleep(self, delay: float) -> None:
+            time.sleep(delay)
+
+    result = run_tests(SleepTests)
+
+    assert len(result.failures) == 1
+    test, message = result.failures[0]
+    assert test.id().endswith("test_sleep_long")
+    assert "time.sleep(delay)" in message
+    assert "AssertionError: Timed out after 0.05 seconds" in message
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: delay=10.0\n")
+
+
+def test_timeout_subtest():
+    class SleepTests(ParametrizedTestCase):
+        @parametrize("delay", [0.0, 10.0], mode="subtest", timeout=0.05)
+        def test_sleep(self, delay: float) -> None:
+            time.sleep(delay)
+
+    result = run_tests(SleepTests)
+
+    assert len(result.failures) == 1
+    assert "Timed out after 0.05 seconds" in result.failures[0][1]
+
+
+def test_timeout_async():
+    class SleepTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize("delay", [0.0, 10.0], timeout=0.05)
+        async def test_sleep(self, delay: float) -> None:
+            await asyncio.sleep(delay)
+
+        @parametrize("delay", [0.0, 10.0], mode="subtest", timeout=0.05)
+        async def test_sleep_subtest(self, delay: float) -> None:
+            await asyncio.sleep(delay)
+
+        @parametrize("delay", [0.0, 10.0], mode="subtest", workers=2, timeout=0.05)
+        async def test_sleep_workers(self, delay: float) -> None:
+            await asyncio.sleep(delay)
+
+    result = run_tests(SleepTests)
+
+    assert len(result.failures) == 3
+    for _, message in result.failures:
+        assert "await asyncio.sleep(delay)" in message
+        assert "AssertionError: Timed out after 0.05 seconds" in message
+
+
+def test_timeout_async_benchmark():
+    class SleepTests(ParametrizedTestCase, IsolatedAsyncioTestCase):
+        @parametrize("delay", [10.0], mode="benchmark", timeout=0.05)
+        async def test_sleep(self, delay: float) -> None:
+            await asyncio.sleep(delay)
+
+    result = run_tests(SleepTests)
+
+    assert len(result.failures) == 1
+    assert "Timed out after 0.05 seconds" in result.failures[0][1]
+
+
+def test_timeout_thread():
+    release = threading.Event()
+
+    class WaitTests(ParametrizedTestCase):
+        @parametrize("timeout", [0.05], timeout=0.05)
+        def test_wait(self, timeout: float) -> None:
+            release.wait(10.0)
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(run_tests(WaitTests)))
+    thread.start()
+    thread.join()
+    release.set()
+
+    (result,) = results
+    assert len(result.failures) == 1
+    message = result.failures[0][1]
+    assert "AssertionError: Timed out after 0.05 seconds, in:\n" in message
+    assert "release.wait(10.0)" in message
+    if sys.version_info >= (3, 11):
+        assert message.endswith("\nTest parameters: timeout=0.05\n")
+
+
+def test_timeout_thread_finished():
+    class CheckTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2], timeout=10.0)
+        def test_check(self, x: int) -> None:
+            self.assertEqual(x, 1)
+
+        @parametrize("x", [1], mode="benchmark", timeout=10.0)
+        def test_benchmark(self, x: int) -> None:
+            pass
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(run_tests(CheckTests)))
+    thread.start()
+    thread.join()
+
+    (result,) = results
+    assert result.testsRun == 3
+    assert len(result.failures) == 1
+    test, message = result.failures[0]
+    assert test.id().endswith("test_check_1")
+    assert "self.assertEqual(x, 1)" in message
+
+
+def test_timeout_workers():
+    release = threading.Event()
+
+    class WaitTests(ParametrizedTestCase):
+        @parametrize("x", [1, 2, 3], mode="subtest", workers=2, timeout=0.05)
+        def test_wait(self, x: int) -> None:
+            if x == 2:
+                release.wait(10.0)
+
+    start = time.monotonic()
+    result = run_tests(WaitTests)
+    release.set()
+
+    assert time.monotonic() - start < 5.0
+    assert result.testsRun == 1
+    assert len(result.failures) == 1
+    test, message = result.failures[0]
+    assert test.id().endswith("(x=2)")
+    assert "AssertionError: Timed out after 0.05 seconds, in:\n" in message
+    assert "release.wait(10.0)" in message
+
+
+def test_timeout_outer_timer():
+    class SleepTests(ParametrizedTestCase):
+        @parametrize("x", [1], timeout=1.0)
+        def test_sleep(self, x: int) -> None:
+            pass
+
+    previous = signal.signal(signal.SIGALRM, lambda signum, frame: None)
+    signal.setitimer(signal.ITIMER_REAL, 30.0, 5.0)
+    try:
+        result = run_tests(SleepTests)
+        delay, interval = signal.getitimer(signal.ITIMER_REAL)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+    assert result.wasSuccessful()
+    assert 25.0 < delay <= 30.0
+    assert interval == 5.0
+
+
+def test_timeout_cached(cache_dir):
+    def make_cases() -> list[param]:
+        return [param(1, timeout=2.0)]
+
+    parametrize.cached("x", make_cases, timeout=3.0)
+    decorator = parametrize.cached("x", make_cases, timeout=3.0)
+
+    assert decorator._parametrized.timeout == 3.0
+    assert decorator._parametrized.params[0].timeout == 2.0
+
+
+def test_timeout_lazy():
+    assert param.lazy(list, timeout=1.5).timeout == 1.5
+
+
+@pytest.mark.parametrize("timeout", [0, -1.0])
+def test_timeout_invalid(timeout):
+    with pytest.raises(ValueError) as excinfo:
+        parametrize("x", [1], timeout=timeout)
+
+    assert excinfo.value.args[0] == f"timeout must be greater than 0, not {timeout!r}"
+
+
+def test_timeout_param_invalid():
+    with pytest.raises(ValueError) as excinfo:
+        param(1, timeout=0)
+
+    assert excinfo.value.args[0] == "timeout must be greater than 0, not 0"
+
+
+@pytest.fixture
+def runner_dir(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("RUNNER_LOG", str(tmp_path / "log.txt"))
+    modules = set(sys.modules)
+    yield tmp_path
+    for name in set(sys.modules) - modules:
+        del sys.modules[name]
+
+
+def write_runner_tests(directory: Any, name: str, source: str) -> None:
+    (directory / f"{name}.py").write_text(
+        "import os\n"
+        + "import unittest\n"
+        + "from unittest_parametrize import ParametrizedTestCase, parametrize\n"
+        + "\n"
+        + "def log(message):\n"
+        + "    with open(os.environ['RUNNER_LOG'], 'a') as fp:\n"
+        + "        fp.write(f'{message}\\n')\n"
+        + source
+    )
+
+
+def read_runner_log(directory: Any) -> list[str]:
+    lines: list[str] = (directory / "log.txt").read_text().splitlines()
+    return lines
+
+
+def run_runner(directory: Any, *args: str) -> int:
+    return _runner.main(["-s", str(directory), "-t", str(directory), *args])
+
+
+def test_runner(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_basic",
+        """
+class SquareTests(ParametrizedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        log("setUpClass")
+
+    @parametrize("x", [1, 2, 3, 4, 5])
+    def test_square(self, x):
+        self.assertNotEqual(x, 3)
+
+    @parametrize("x", [1, 2], mode="subtest")
+    def test_subtest(self, x):
+        '''Check subtests.'''
+        self.assertEqual(x, 1)
+
+    def test_error(self):
+        raise ValueError("oops")
+
+    @unittest.skip("not today")
+    def test_skip(self):
+        pass
+
+    @unittest.expectedFailure
+    def test_expected_failure(self):
+        self.fail()
+
+    @unittest.expectedFailure
+    def test_unexpected_success(self):
+        pass
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "1", "--chunk-size", "2", "-v") == 1
+
+    assert read_runner_log(runner_dir) == ["setUpClass"]
+    err = capsys.readouterr().err
+    assert "test_square_0 (test_runner_basic.SquareTests" in err
+    assert "Check subtests." in err
+    assert "ValueError: oops" in err
+    assert "AssertionError: 3 == 3" in err
+    assert "Ran 10 tests in " in err
+    assert (
+        "FAILED (failures=2, errors=1, skipped=1, expected failures=1,"
+        + " unexpected successes=1)"
+    ) in err
+
+
+def test_runner_steal(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_steal",
+        """
+class SquareTests(ParametrizedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        log(os.getpid())
+
+    @parametrize("x", [1, 2, 3, 4])
+    def test_square(self, x):
+        pass
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "2", "--chunk-size", "1") == 0
+
+    # The idle worker stole chunks, setting up the class itself.
+    assert len(set(read_runner_log(runner_dir))) == 2
+    assert "Ran 4 tests in " in capsys.readouterr().err
+
+
+def test_runner_names(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_names",
+        """
+class SquareTests(ParametrizedTestCase):
+    @parametrize("x", [1, 2, 3])
+    def test_square(self, x):
+        log(x)
+""",
+    )
+
+    assert _runner.main(["test_runner_names.SquareTests.test_square_1"]) == 0
+
+    assert read_runner_log(runner_dir) == ["2"]
+    assert "Ran 1 test in " in capsys.readouterr().err
+
+
+def test_runner_async(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_async",
+        """
+class SquareTests(ParametrizedTestCase, unittest.IsolatedAsyncioTestCase):
+    @parametrize("x", [1, 2])
+    async def test_square(self, x):
+        log(os.getpid())
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "1") == 0
+
+    assert read_runner_log(runner_dir) != [str(os.getpid())] * 2
+
+
+def test_runner_failed_import(runner_dir, capsys):
+    (runner_dir / "test_runner_broken.py").write_text("import nonexistent_module\n")
+
+    assert run_runner(runner_dir) == 1
+
+    err = capsys.readouterr().err
+    assert "ModuleNotFoundError: No module named 'nonexistent_module'" in err
+    assert "Ran 1 test in " in err
+
+
+def test_runner_set_up_class_error(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_set_up_class",
+        """
+class SquareTests(ParametrizedTestCase):
+    @classmethod
+    def setUpClass(cls):
+        raise ValueError("no class")
+
+    @parametrize("x", [1, 2])
+    def test_square(self, x):
+        pass
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "1") == 1
+
+    err = capsys.readouterr().err
+    assert "ERROR: setUpClass (test_runner_set_up_class.SquareTests)" in err
+    assert "ValueError: no class" in err
+
+
+def test_runner_worker_exit(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_exit",
+        """
+class ExitTests(ParametrizedTestCase):
+    @parametrize("code", [0, 3, 0, 4])
+    def test_exit(self, code):
+        if code:
+            os._exit(code)
+        log(code)
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "1", "--chunk-size", "1") == 1
+
+    assert read_runner_log(runner_dir) == ["0", "0"]
+    err = capsys.readouterr().err
+    assert "ERROR: test_exit_1 (test_runner_exit.ExitTests" in err
+    assert "Worker process exited with code 3" in err
+    assert "ERROR: test_exit_3 (test_runner_exit.ExitTests" in err
+    assert "Worker process exited with code 4" in err
+    assert "Ran 4 tests in " in err
+
+
+def test_runner_worker_exit_mid_chunk(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_exit_mid_chunk",
+        """
+class ExitTests(ParametrizedTestCase):
+    @parametrize("code", [0, 3, 0])
+    def test_exit(self, code):
+        if code:
+            os._exit(code)
+        log(code)
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "1", "--chunk-size", "3") == 1
+
+    # The replacement worker ran the rest of the chunk.
+    assert read_runner_log(runner_dir) == ["0", "0"]
+    err = capsys.readouterr().err
+    assert "ERROR: test_exit_0 " not in err
+    assert "ERROR: test_exit_1 (test_runner_exit_mid_chunk.ExitTests" in err
+    assert "ERROR: test_exit_2 " not in err
+    assert "Ran 3 tests in " in err
+    assert "FAILED (errors=1)" in err
+
+
+def test_runner_worker_exit_tear_down(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_exit_tear_down",
+        """
+class ExitTests(ParametrizedTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        os._exit(5)
+
+    @parametrize("x", [1])
+    def test_pass(self, x):
+        pass
+""",
+    )
+
+    assert run_runner(runner_dir, "-j", "1") == 1
+
+    err = capsys.readouterr().err
+    assert "ERROR: tearDown (worker process)" in err
+    assert "Worker process exited with code 5" in err
+
+
+def test_runner_replay():
+    result = unittest.TextTestRunner(
+        stream=io.StringIO(),
+        resultclass=_runner._RemoteResult,  # type: ignore [arg-type]
+    )._makeResult()
+
+    _runner._replay(
+        [
+            ("startTest", ("a.Tests.test_x", "test_x (a.Tests.test_x)", None)),
+            (
+                "addFailure",
+                ("a.Tests.test_x", "test_x (a.Tests.test_x)", None),
+                (True, "Traceback"),
+            ),
+        ],
+        result,
+    )
+
+    assert result.testsRun == 1
+    test, _ = result.failures[0]
+    assert test.id() == "a.Tests.test_x"
+
+
+def test_runner_failfast(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_failfast",
+        """
+class FailTests(ParametrizedTestCase):
+    @parametrize("x", [1, 2, 3])
+    def test_fail(self, x):
+        log(x)
+        self.fail()
+""",
+    )
+    (runner_dir / "test_runner_failfast_broken.py").write_text("import nonexistent\n")
+
+    assert run_runner(runner_dir, "-f", "-j", "1", "--chunk-size", "1") == 1
+
+    assert read_runner_log(runner_dir) == ["1"]
+    err = capsys.readouterr().err
+    assert "Ran 1 test in " in err
+    assert "FAILED (failures=1)" in err
+
+
+def test_runner_last_failed_first(runner_dir, cache_dir, monkeypatch, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_last_failed",
+        """
+class SquareTests(ParametrizedTestCase):
+    @parametrize("x", [1, 2, 3])
+    def test_square(self, x):
+        log(x)
+""",
+    )
+    cache_dir.mkdir()
+    (cache_dir / "lastfailed.json").write_text(
+        json.dumps({"test_runner_last_failed.SquareTests": ["test_square_2"]})
+    )
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_LAST_FAILED", "first")
+
+    assert run_runner(runner_dir, "-j", "1") == 0
+
+    assert read_runner_log(runner_dir) == ["3", "1", "2"]
+
+
+def test_runner_saves_records(runner_dir, cache_dir, tmp_path, monkeypatch, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_records",
+        """
+class SquareTests(ParametrizedTestCase):
+    @parametrize("x", [1, 2, 3], profile="aggregate")
+    def test_square(self, x):
+        log(x)
+        self.assertNotEqual(x, 2)
+""",
+    )
+    profile_dir = tmp_path / "prof"
+    timings_file = tmp_path / "timings.json"
+    report_file = tmp_path / "report.json"
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_LAST_FAILED", "record")
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_INCREMENTAL", "1")
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_PROFILE_DIR", str(profile_dir))
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_TIMINGS_FILE", str(timings_file))
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_REPORT_FILE", str(report_file))
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_SLOWEST", "2")
+
+    assert run_runner(runner_dir, "-j", "2", "--chunk-size", "1") == 1
+    # Saved at exit, like the main process does.
+    _last_failed.save()
+    _incremental.save()
+    _profiles.save()
+    _timings.save()
+    _timings.report()
+
+    class_name = "test_runner_records.SquareTests"
+    assert json.loads((cache_dir / "lastfailed.json").read_text()) == {
+        class_name: ["test_square_1"]
+    }
+    assert list(json.loads((cache_dir / "incremental.json").read_text())) == [
+        class_name
+    ]
+    assert (profile_dir / f"{class_name}.test_square.pstats").exists()
+    assert sorted(json.loads(timings_file.read_text())[class_name]) == [
+        "test_square_0",
+        "test_square_1",
+        "test_square_2",
+    ]
+    assert len(json.loads(report_file.read_text())) == 3
+    assert "Slowest 2 parametrized tests:" in capsys.readouterr().err
+
+    # A later run reads the records back.
+    (runner_dir / "log.txt").unlink()
+    _last_failed._store._loaded.clear()
+    _incremental._store._loaded.clear()
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_LAST_FAILED", "only")
+    monkeypatch.delenv("UNITTEST_PARAMETRIZE_SLOWEST")
+
+    assert run_runner(runner_dir, "-j", "1") == 1
+
+    assert read_runner_log(runner_dir) == ["2"]
+    _last_failed.save()
+    _incremental.save()
+    _profiles.save()
+    _timings.save()
+    _timings.report()
+
+
+def test_runner_buffer(runner_dir, capfd):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_buffer",
+        """
+class PrintTests(ParametrizedTestCase):
+    @parametrize("x", [1, 2])
+    def test_print(self, x):
+        print(f"output {x}")
+        self.assertEqual(x, 1)
+""",
+    )
+
+    assert run_runner(runner_dir, "-b", "-j", "1") == 1
+
+    out, err = capfd.readouterr()
+    assert "output 1" not in out + err
+    assert "Stdout:\noutput 2" in err
+
+
+def test_runner_sample_spawn(runner_dir, monkeypatch, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_sample",
+        """
+class SquareTests(ParametrizedTestCase):
+    @parametrize("x", range(100))
+    def test_square(self, x):
+        log(x)
+""",
+    )
+    monkeypatch.setenv("UNITTEST_PARAMETRIZE_SAMPLE_SIZE", "5")
+    monkeypatch.delenv("UNITTEST_PARAMETRIZE_SAMPLE_SEED", raising=False)
+    # Spawned workers import the tests afresh, without the parent's seed.
+    get_context = multiprocessing.get_context
+    monkeypatch.setattr(multiprocessing, "get_context", lambda: get_context("spawn"))
+
+    assert run_runner(runner_dir, "-j", "2", "--chunk-size", "1") == 0
+
+    assert len(read_runner_log(runner_dir)) == 5
+    assert "Ran 5 tests in " in capsys.readouterr().err
+
+
+def test_runner_interrupted(runner_dir):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_interrupted",
+        """
+class SquareTests(ParametrizedTestCase):
+    @parametrize("x", [1, 2])
+    def test_square(self, x):
+        pass
+""",
+    )
+
+    with (
+        mock.patch.object(_runner, "_replay", side_effect=KeyboardInterrupt),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        run_runner(runner_dir, "-j", "2", "--chunk-size", "1")
+
+    assert multiprocessing.active_children() == []
+
+
+@pytest.mark.parametrize(
+    "args,message",
+    [
+        (["-j", "0"], "--jobs must be at least 1, not 0"),
+        (["--chunk-size", "0"], "--chunk-size must be at least 1, not 0"),
+    ],
+)
+def test_runner_invalid_args(args, message, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        _runner.main(args)
+
+    assert excinfo.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_runner_main_module(runner_dir, capsys):
+    write_runner_tests(
+        runner_dir,
+        "test_runner_main",
+        """
+class SquareTests(ParametrizedTestCase):
+    @parametrize("x", [1])
+    def test_square(self, x):
+        pass
+""",
+    )
+    argv = ["unittest_parametrize", "-s", str(runner_dir), "-t", str(runner_dir)]
+
+    with mock.patch.object(sys, "argv", argv), pytest.raises(SystemExit) as excinfo:
+        runpy.run_module("unittest_parametrize", run_name="__main__")
+
+    assert excinfo.value.code == 0
+    assert "Ran 1 test in " in capsys.readouterr().err
+
+
+def test_runner_main_module_spawned():
+    # Spawned workers import the main module under another name.
+    runpy.run_module("unittest_parametrize", run_name="__mp_main__")